@@ -0,0 +1,28 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from rest_framework import filters
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+        Search filter with an optional typo-tolerant mode.
+
+        Features:
+            - Behaves like `SearchFilter` (`icontains`, served by the trigram GIN index) by default.
+            - With `?match=fuzzy`, matches the first search field by trigram similarity and
+              ranks results by it.
+    """
+    match_param = 'match'
+
+    def filter_queryset(self, request, queryset, view):
+        if request.query_params.get(self.match_param) != 'fuzzy':
+            return super().filter_queryset(request, queryset, view)
+
+        search_terms = ' '.join(self.get_search_terms(request))
+        search_fields = self.get_search_fields(view, request)
+        if not search_terms or not search_fields:
+            return queryset
+
+        field = search_fields[0].lstrip('^=@$')
+        return queryset.filter(**{f'{field}__trigram_similar': search_terms}).annotate(
+            similarity=TrigramSimilarity(field, search_terms)
+        ).order_by('-similarity', 'pk')
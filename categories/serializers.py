@@ -46,8 +46,9 @@ class TagSerializer(serializers.ModelSerializer):
             - Handles both new and existing tags gracefully.
 
         Overrides:
-            - `to_internal_value`: Processes tag data to check if it refers to an existing tag.
-              If the tag exists, it is returned instead of creating a duplicate.
+            - `to_internal_value`: Validates the tag name without touching the database.
+              Existing tags are looked up (and missing ones created) in bulk by the parent
+              serializer, see `courses.services.tags.resolve_tags`.
     """
     class Meta:
         model = Tag
@@ -56,12 +57,14 @@ class TagSerializer(serializers.ModelSerializer):
     def to_internal_value(self, data):
         if isinstance(data, dict):
             name = data.get('name')
-            if not name:
+            if not name or not isinstance(name, str) or not name.strip():
                 raise serializers.ValidationError({"name": "This field is required."})
-            try:
-                tag = Tag.objects.get(name=name)
-                return tag
-            except Tag.DoesNotExist:
-                return super().to_internal_value(data)
+            name = name.strip()
+            max_length = Tag._meta.get_field('name').max_length
+            if len(name) > max_length:
+                raise serializers.ValidationError(
+                    {"name": f"Ensure this field has no more than {max_length} characters."}
+                )
+            return {'name': name}
 
         raise serializers.ValidationError("Invalid data format for Tag.")
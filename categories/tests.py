@@ -1,3 +1,39 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from categories.models import Category, Tag
+from courses.models import Course
+from edunexus.testing import assert_queries_do_not_scale, clear_caches
+from users.models import CustomUser
+
+
+class CategoryCoursesQueryCountTests(TestCase):
+    """
+        Checks that the courses of a category are listed with their tags loaded up front.
+    """
+    def setUp(self):
+        clear_caches()
+        self.instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        self.category = Category.objects.create(name='Programming')
+        self.tags = [Tag.objects.create(name=name) for name in ('python', 'django')]
+
+    def create_courses(self, count):
+        for index in range(Course.objects.count(), count):
+            course = Course.objects.create(
+                title=f'Course {index}', description='Description', instructor=self.instructor,
+                category=self.category, price=Decimal('10.00'),
+            )
+            course.tags.add(*self.tags)
+
+    def test_category_courses(self):
+        url = f'/categories/{self.category.id}/courses/'
+        assert_queries_do_not_scale(self, self.create_courses, lambda: self.client.get(url))
+
+    def test_category_courses_stream(self):
+        url = f'/categories/{self.category.id}/courses/?stream=ndjson'
+        assert_queries_do_not_scale(
+            self, self.create_courses, lambda: b''.join(self.client.get(url).streaming_content), sizes=(1, 5, 10)
+        )
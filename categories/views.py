@@ -1,22 +1,29 @@
-from rest_framework import viewsets, filters, status
+from rest_framework import viewsets, status
 from rest_framework.decorators import action, permission_classes
 from rest_framework.permissions import IsAdminUser, AllowAny, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.response import Response
 
+from categories.filters import TrigramSearchFilter
 from categories.models import Category
 from categories.serializers import CategorySerializer
+from courses.cache import CATALOG_CACHE_CONTROL, catalog_cache_key, catalog_tier, get_catalog_validators
 from courses.models import Course
+from courses.pagination import CourseCursorPagination
 from courses.serializers import CourseSerializer
+from courses.streaming import stream_ndjson, wants_ndjson_stream
+from edunexus.cached_compute import describe_request
+from edunexus.conditional import ConditionalGetMixin
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
         A ModelViewSet for managing categories in the application.
 
         Features:
             - Supports all CRUD operations for categories (create, retrieve, update, delete).
-            - Allows users to filter and search categories by name.
+            - Allows users to filter and search categories by name (`?search=`), with a
+              typo-tolerant mode (`?match=fuzzy`) backed by a trigram index.
             - Provides a custom endpoint for fetching courses within a specific category.
 
         Attributes:
@@ -25,24 +32,48 @@ class CategoryViewSet(viewsets.ModelViewSet):
             - `filter_backends`: Backends used for filtering and searching.
             - `search_fields`: Specifies fields to be searched (name).
             - `filterset_fields`: Specifies fields to be used for filtering (name).
+            - `use_cache`: Set to `False` to bypass the cache, as background recomputations do.
+            - `cache_control`: HTTP caching policy of the read actions.
 
         Methods:
             - `get_permissions`: Dynamically determines permissions based on the action.
+            - `list`: Lists categories through the two-tier catalog cache, keyed by the search,
+              filter and page parameters and invalidated whenever the catalog changes.
             - Any user can list or retrieve categories and fetch their courses.
             - Only admin users can create, update, or delete categories.
-            - `courses`: A custom action to fetch all courses that belong to a specific category.
+            - `courses`: A custom action to fetch the courses that belong to a specific category,
+              paginated by a `created_at, id` cursor or streamed as NDJSON with `?stream=ndjson`.
+            - `get_validators`: `list`, `retrieve` and `courses` carry an ETag derived from the
+              catalog generation, so conditional requests for unchanged data get a 304.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend]
+    filter_backends = [TrigramSearchFilter, DjangoFilterBackend]
     search_fields = ['name']
     filterset_fields = ['name']
+    use_cache = True
+    conditional_actions = ('list', 'retrieve', 'courses')
+    cache_control = dict.fromkeys(conditional_actions, CATALOG_CACHE_CONTROL)
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve', 'courses']:
             return [AllowAny()]
         return [IsAdminUser()]
 
+    def get_validators(self):
+        return get_catalog_validators()
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_cache:
+            return super().list(request, *args, **kwargs)
+
+        params = {'search', 'match', 'page', *self.filterset_fields}
+        cache_key = catalog_cache_key('category_list', request.query_params, params)
+        list_categories = super().list
+        return Response(catalog_tier.get_or_compute(
+            cache_key, 'categories.list', describe_request(request), lambda: list_categories(request, *args, **kwargs).data
+        ))
+
     @action(detail=True, methods=['get'], url_path='courses')
     def courses(self, request, pk=None):
         try:
@@ -50,7 +81,12 @@ class CategoryViewSet(viewsets.ModelViewSet):
         except Category.DoesNotExist:
             return Response({"error": "Category not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        courses = Course.objects.filter(category=category)
-        serializer = CourseSerializer(courses, many=True, context={'request': request})
+        courses = CourseSerializer.setup_eager_loading(Course.objects.filter(category=category))
+        paginator = CourseCursorPagination()
+
+        if wants_ndjson_stream(request):
+            return stream_ndjson(courses.order_by(*paginator.ordering), CourseSerializer, context={'request': request})
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        page = paginator.paginate_queryset(courses, request, view=self)
+        serializer = CourseSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
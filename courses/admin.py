@@ -1,5 +1,5 @@
 from django.contrib import admin
-from courses.models import Course, Enrollment, Lesson
+from courses.models import Course, CoursePopularity, Enrollment, Lesson
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
@@ -23,3 +23,11 @@ class LessonAdmin(admin.ModelAdmin):
     list_filter = ('course', 'created_at')
     search_fields = ('title', 'course__title')
     ordering = ('created_at',)
+
+
+@admin.register(CoursePopularity)
+class CoursePopularityAdmin(admin.ModelAdmin):
+    list_display = ('id', 'course', 'window', 'category', 'enrollment_count', 'refreshed_at')
+    list_filter = ('window', 'category')
+    search_fields = ('course__title',)
+    ordering = ('window', '-enrollment_count')
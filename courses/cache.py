@@ -0,0 +1,222 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+from edunexus.tiered_cache import TieredCache
+
+# Bump whenever the output of CourseSerializer changes shape.
+COURSE_SERIALIZER_VERSION = 2
+
+CATALOG_GENERATION_KEY = 'catalog:generation'
+CATALOG_INVALIDATIONS_KEY = 'catalog:stats:invalidations'
+CATALOG_MODIFIED_KEY = 'catalog:modified_at'
+
+# Enrollment and course version counters outlive everything cached under them: enrollment
+# pages are kept for the namespace TTL plus as long again while stale (see
+# `cached_compute.fetch`), course payloads for one TTL.
+ENROLLMENT_VERSION_TIMEOUT = 3 * settings.CACHE_NAMESPACES['enrollments']
+
+# HTTP caching policy of catalog responses: browsers and CDNs may reuse them for a minute,
+# then revalidate with the ETag.
+CATALOG_CACHE_CONTROL = 'public, max-age=60'
+
+# Hot catalog reads are served from an in-process LRU in front of the shared `catalog`
+# cache; `bump_catalog_generation` clears it in every process over Redis pub/sub. Entries
+# are keyed by the catalog generation, which is read from the shared cache, so a process
+# that misses the message still stops serving them after a bump.
+catalog_tier = TieredCache(
+    'catalog',
+    channel='catalog:invalidate',
+    max_entries=settings.CATALOG_L1_CACHE['MAX_ENTRIES'],
+    timeout=settings.CATALOG_L1_CACHE['TIMEOUT'],
+)
+
+
+def catalog_cache():
+    """Cache of catalog responses and counters (the `catalog` namespace)."""
+    return caches['catalog']
+
+
+def enrollments_cache():
+    """Cache of per-user enrollment pages (the `enrollments` namespace)."""
+    return caches['enrollments']
+
+
+def _increment(key, cache=None, initial=1, timeout=None):
+    """
+    Atomically increment a counter, creating it at `initial` on first use.
+
+    Args:
+        key (str): The counter key.
+        cache (BaseCache, optional): The cache holding the counter (default is the catalog cache).
+        initial (int): The value of a new counter.
+        timeout (int, optional): TTL of a new counter; increments keep it, and `None` never expires.
+
+    Returns:
+        int: The incremented value.
+    """
+    cache = catalog_cache() if cache is None else cache
+    if cache.add(key, initial, timeout=timeout):
+        return initial
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The counter was evicted between `add` and `incr`.
+        cache.set(key, initial, timeout=timeout)
+        return initial
+
+
+def get_catalog_generation(generation=None):
+    """
+    Return the current catalog generation.
+
+    Every cached catalog response embeds the generation in its key, so bumping
+    it invalidates all of them at once without scanning the cache. The generation
+    is always read from the shared cache (one small GET), never from L1: a process
+    that missed an invalidation message must still see a bump as soon as it happens.
+
+    Args:
+        generation (int, optional): The value already read from the shared cache, if any.
+    """
+    if generation is None:
+        generation = catalog_cache().get(CATALOG_GENERATION_KEY)
+    if generation is None:
+        catalog_cache().add(CATALOG_GENERATION_KEY, 1, timeout=None)
+        generation = catalog_cache().get(CATALOG_GENERATION_KEY, 1)
+    return generation
+
+
+def get_catalog_validators():
+    """
+    Return the HTTP validators of catalog responses, read without touching the database.
+
+    Both values are read from the shared cache in one round-trip, so they change in
+    every process as soon as a catalog write commits.
+
+    Returns:
+        tuple: The catalog version (serializer version and generation) and the time of the
+        last catalog write as a datetime, or `None` if the catalog was never written.
+    """
+    values = catalog_cache().get_many([CATALOG_GENERATION_KEY, CATALOG_MODIFIED_KEY])
+    modified_at = values.get(CATALOG_MODIFIED_KEY)
+    if modified_at is not None:
+        modified_at = datetime.fromtimestamp(modified_at, tz=timezone.utc)
+    generation = get_catalog_generation(values.get(CATALOG_GENERATION_KEY))
+    return f'v{COURSE_SERIALIZER_VERSION}:g{generation}', modified_at
+
+
+def bump_catalog_generation():
+    """
+    Invalidate every cached catalog response, in L2 and in the L1 of every process.
+    """
+    _increment(CATALOG_GENERATION_KEY)
+    _increment(CATALOG_INVALIDATIONS_KEY)
+    catalog_cache().set(CATALOG_MODIFIED_KEY, int(time.time()), timeout=None)
+    catalog_tier.invalidate()
+
+
+def get_cache_stats():
+    """
+    Return the per-tier hit and miss counters, the invalidation counter, the current
+    generation and the size of this process's L1.
+    """
+    stats = catalog_tier.stats()
+    stats['invalidations'] = catalog_cache().get(CATALOG_INVALIDATIONS_KEY, 0)
+    stats['generation'] = get_catalog_generation()
+    return stats
+
+
+def normalize_query_params(query_params, allowed_params):
+    """
+    Reduce request query parameters to a canonical, order-independent string.
+
+    Unknown parameters and blank values are dropped so they cannot fragment the cache.
+
+    Args:
+        query_params (QueryDict): The request query parameters.
+        allowed_params (Iterable[str]): Parameter names that affect the response.
+
+    Returns:
+        str: The URL-encoded, sorted parameters.
+    """
+    allowed_params = set(allowed_params)
+    normalized = []
+    for name in sorted(query_params.keys()):
+        if name not in allowed_params:
+            continue
+        values = sorted(value.strip() for value in query_params.getlist(name) if value.strip())
+        normalized.extend((name, value) for value in values)
+    return urlencode(normalized)
+
+
+def catalog_cache_key(prefix, query_params=None, allowed_params=()):
+    """
+    Build the cache key of a catalog response.
+
+    The key combines the serializer version, the catalog generation and a digest
+    of the normalized filter, ordering and page parameters.
+    """
+    params = normalize_query_params(query_params, allowed_params) if query_params is not None else ''
+    digest = hashlib.sha256(params.encode()).hexdigest()
+    return f'{prefix}:v{COURSE_SERIALIZER_VERSION}:g{get_catalog_generation()}:{digest}'
+
+
+def course_list_cache_key(query_params, allowed_params):
+    return catalog_cache_key('course_list', query_params, allowed_params)
+
+
+def _bump_version(key):
+    # A counter created after its predecessor expired starts from the clock, above any
+    # version still referenced by cached entries; increments never depend on the clock.
+    return _increment(key, enrollments_cache(), initial=time.time_ns(), timeout=ENROLLMENT_VERSION_TIMEOUT)
+
+
+def get_user_enrollments_version(user_id):
+    """
+    Return the version of a user's enrollments, embedded in the keys of their cached pages.
+    """
+    return enrollments_cache().get(f'user_version:{user_id}', 0)
+
+
+def enrollments_cache_key(user_id, version, cursor):
+    return f"user_enrollments_{user_id}_v{version}_{cursor}"
+
+
+def invalidate_user_enrollments(user_ids):
+    """
+    Invalidate every cached enrollment page of each user after their enrollments changed.
+
+    Each user's version is incremented, so pages cached under the previous one (including
+    ones a background recomputation is still writing) are never read again and expire on
+    their own.
+    """
+    for user_id in user_ids:
+        _bump_version(f'user_version:{user_id}')
+
+
+def get_course_versions(course_ids):
+    """
+    Return the version of each course's cached enrollment payload, keyed by course ID.
+    """
+    keys = {course_id: f'course_version:{course_id}' for course_id in course_ids}
+    versions = enrollments_cache().get_many(keys.values())
+    return {course_id: versions.get(key, 0) for course_id, key in keys.items()}
+
+
+def bump_course_versions(course_ids):
+    """
+    Invalidate the cached enrollment payloads of courses after they were edited.
+
+    Only the edited courses are recomputed on the next read; cached enrollment pages
+    reference courses by ID and stay valid.
+    """
+    for course_id in course_ids:
+        _bump_version(f'course_version:{course_id}')
+
+
+def course_payload_cache_key(course_id, version):
+    return f'course_payload:{course_id}:v{version}:s{COURSE_SERIALIZER_VERSION}'
@@ -0,0 +1,37 @@
+"""
+Cached catalog and enrollment responses that a Celery worker can recompute.
+
+Each computation runs on a request rebuilt from the `describe_request` data stored with
+the cached value; most replay their view with the view's caches bypassed.
+"""
+from rest_framework.request import Request
+
+from categories.views import CategoryViewSet
+from courses.services.enrollment_cache import get_enrollment_rows
+from courses.views import CourseViewSet, PopularCoursesView
+from edunexus.cached_compute import rebuild_request, register, replay_view
+
+
+@register('courses.list')
+def course_list(params):
+    return replay_view(CourseViewSet.as_view({'get': 'list'}, use_cache=False), params)
+
+
+@register('courses.detail')
+def course_detail(params):
+    return replay_view(CourseViewSet.as_view({'get': 'retrieve'}, use_cache=False), params, pk=params['pk'])
+
+
+@register('courses.enrollments')
+def user_enrollment_rows(params):
+    return get_enrollment_rows(params['user_id'], Request(rebuild_request(params)))
+
+
+@register('courses.popular')
+def popular_courses(params):
+    return replay_view(PopularCoursesView.as_view(use_cache=False), params)
+
+
+@register('categories.list')
+def category_list(params):
+    return replay_view(CategoryViewSet.as_view({'get': 'list'}, use_cache=False), params)
@@ -1,40 +1,111 @@
 import django_filters
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import F
+from django_filters.constants import EMPTY_VALUES
+
 from .models import Course
 
 
+class CourseOrderingFilter(django_filters.OrderingFilter):
+    """
+        Ordering filter that keeps unrated courses last and breaks ties by `id`,
+        so paginated results stay stable across pages.
+    """
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+
+        ordering = []
+        for param in value:
+            field = self.get_ordering_value(param)
+            expression = F(field.lstrip('-'))
+            if field.startswith('-'):
+                ordering.append(expression.desc(nulls_last=True))
+            else:
+                ordering.append(expression.asc(nulls_last=True))
+        ordering.append('id')
+        return qs.order_by(*ordering)
+
+
+MATCH_CHOICES = [
+    ('contains', 'Contains'),
+    ('fuzzy', 'Fuzzy'),
+]
+
+
 class CourseFilter(django_filters.FilterSet):
     """
         Custom filter for courses.
 
         Features:
             - Filters courses based on title, category, instructor, tags, and minimum rating.
+            - Every filter is pushed into a single SQL query, so filters compose freely.
 
         Fields:
             - `title`: Filters courses containing the title (case-insensitive).
             - `category`: Filters courses based on their category name.
             - `instructor`: Filters courses by the instructor's username.
+            - `match`: `contains` (default) or `fuzzy`. Fuzzy matching tolerates typos in
+              `title`, `category` and `instructor` and ranks results by trigram similarity
+              unless an explicit `ordering` is given. Both modes use the trigram GIN indexes.
             - `tags`: Filters courses based on tags.
             - `min_rating`: Filters courses with an average rating equal to or above the given value.
+            - `ordering`: Sorts by `rating`, `price` or `created_at` (prefix with `-` for descending).
 
         Methods:
-            - `filter_tags`: Filters courses that include specific tags.
-            - `filter_min_rating`: Filters courses based on a minimum average rating.
+            - `filter_text`: Applies a `contains` or `fuzzy` match to a text field.
+            - `filter_queryset`: Ranks fuzzy matches by similarity.
+            - `filter_tags`: Filters courses that include any of the given tags through a subquery.
+            - `filter_min_rating`: Filters courses based on the stored average rating.
     """
-    title = django_filters.CharFilter(field_name='title', lookup_expr='icontains')
-    category = django_filters.CharFilter(field_name='category__name', lookup_expr='icontains')
-    instructor = django_filters.CharFilter(field_name='instructor__username', lookup_expr='icontains')
+    title = django_filters.CharFilter(field_name='title', method='filter_text')
+    category = django_filters.CharFilter(field_name='category__name', method='filter_text')
+    instructor = django_filters.CharFilter(field_name='instructor__username', method='filter_text')
+    match = django_filters.ChoiceFilter(choices=MATCH_CHOICES, method='filter_match')
     tags = django_filters.CharFilter(method='filter_tags')
     min_rating = django_filters.NumberFilter(method='filter_min_rating')
+    ordering = CourseOrderingFilter(
+        fields=(
+            ('rating_average', 'rating'),
+            ('price', 'price'),
+            ('created_at', 'created_at'),
+        ),
+    )
 
     class Meta:
         model = Course
         fields = ['title', 'category', 'instructor', 'tags', 'min_rating']
 
+    def is_fuzzy(self):
+        return self.form.cleaned_data.get('match') == 'fuzzy'
+
+    def filter_text(self, queryset, name, value):
+        if self.is_fuzzy():
+            return queryset.filter(**{f'{name}__trigram_word_similar': value})
+        return queryset.filter(**{f'{name}__icontains': value})
+
+    def filter_match(self, queryset, name, value):
+        # The mode is read by `filter_text`; it does not filter on its own.
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.is_fuzzy() or self.form.cleaned_data.get('ordering'):
+            return queryset
+
+        similarities = [
+            TrigramWordSimilarity(self.form.cleaned_data[name], self.filters[name].field_name)
+            for name in ('title', 'category', 'instructor')
+            if self.form.cleaned_data.get(name)
+        ]
+        if not similarities:
+            return queryset
+        return queryset.annotate(similarity=sum(similarities[1:], similarities[0])).order_by('-similarity', 'id')
+
     def filter_tags(self, queryset, name, value):
-        tag_names = value.split(',')
-        return queryset.filter(tags__name__in=tag_names).distinct()
+        tag_names = [tag_name.strip() for tag_name in value.split(',') if tag_name.strip()]
+        tagged_courses = Course.tags.through.objects.filter(tag__name__in=tag_names).values('course_id')
+        return queryset.filter(id__in=tagged_courses)
 
     def filter_min_rating(self, queryset, name, value):
-        return queryset.filter(id__in=[
-            course.id for course in queryset if course.average_rating() and course.average_rating() >= value
-        ])
+        return queryset.filter(rating_average__gte=value)
@@ -0,0 +1,89 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from categories.models import Category
+from courses.filters import CourseFilter
+from courses.models import Course
+
+User = get_user_model()
+
+SEED_BATCH_SIZE = 5000
+SEED_WORDS = [
+    'python', 'django', 'machine', 'learning', 'design', 'finance', 'marketing', 'history',
+    'photography', 'algebra', 'statistics', 'javascript', 'guitar', 'cooking', 'writing', 'physics',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency of the course text filters in `contains` and `fuzzy` mode, "
+        "with the trigram indexes enabled (after) and index scans disabled (before)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help="Create this many synthetic courses first.")
+        parser.add_argument('--runs', type=int, default=20, help="Timed runs per scenario.")
+        parser.add_argument('--title', default='pythn lerning', help="Title term (typos exercise fuzzy mode).")
+        parser.add_argument('--category', default='programing', help="Category term.")
+        parser.add_argument('--instructor', default='instrctor', help="Instructor term.")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        self.stdout.write(f"Courses in catalog: {Course.objects.count()}")
+        for field in ('title', 'category', 'instructor'):
+            for mode in ('contains', 'fuzzy'):
+                data = {field: options[field], 'match': mode}
+                before = self.measure(data, options['runs'], use_indexes=False)
+                after = self.measure(data, options['runs'], use_indexes=True)
+                self.stdout.write(
+                    f"{field:<10} {mode:<8} before: median {before[0]:8.1f} ms, p95 {before[1]:8.1f} ms | "
+                    f"after: median {after[0]:8.1f} ms, p95 {after[1]:8.1f} ms"
+                )
+
+    def measure(self, data, runs, use_indexes):
+        timings = []
+        for _ in range(runs):
+            with transaction.atomic():
+                if not use_indexes and connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_indexscan = off')
+                        cursor.execute('SET LOCAL enable_bitmapscan = off')
+                queryset = CourseFilter(data, queryset=Course.objects.all()).qs
+                started = time.perf_counter()
+                list(queryset.values_list('id', flat=True)[:10])
+                timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        return statistics.median(timings), p95
+
+    def seed(self, count):
+        instructor, _ = User.objects.get_or_create(
+            username='benchmark_instructor',
+            defaults={'email': 'benchmark_instructor@example.com', 'role': 'instructor'},
+        )
+        category, _ = Category.objects.get_or_create(name='Programming')
+
+        created = 0
+        while created < count:
+            size = min(SEED_BATCH_SIZE, count - created)
+            Course.objects.bulk_create([
+                Course(
+                    title=' '.join(SEED_WORDS[(created + i + offset) % len(SEED_WORDS)] for offset in range(3))
+                    + f' {uuid.uuid4().hex[:6]}',
+                    description='Synthetic benchmark course.',
+                    instructor=instructor,
+                    category=category,
+                    price=10,
+                )
+                for i in range(size)
+            ])
+            created += size
+            self.stdout.write(f"Seeded {created}/{count} courses")
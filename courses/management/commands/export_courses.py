@@ -0,0 +1,34 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.models import Course
+from courses.services.catalog_transfer import detect_format, iter_export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = "Export courses with their tags and lessons as JSONL or CSV, in the format read by import_courses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="Output file (default: standard output).")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help="File format (default: from the extension).")
+        parser.add_argument('--category', help="Only export courses of this category.")
+
+    def handle(self, *args, **options):
+        queryset = Course.objects.all()
+        if options['category']:
+            queryset = queryset.filter(category__name=options['category'])
+
+        fmt = detect_format(options['path'] or '', options['format'])
+        started = time.monotonic()
+        if options['path']:
+            with open(options['path'], 'w', newline='', encoding='utf-8') as stream:
+                count = write_rows(iter_export_rows(queryset), stream, fmt)
+        else:
+            count = write_rows(iter_export_rows(queryset), sys.stdout, fmt)
+
+        elapsed = time.monotonic() - started
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {count} courses ({count / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from courses.services.catalog_transfer import CourseImporter, DEFAULT_BATCH_SIZE, detect_format, read_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import courses (with tags and lessons) from a JSONL or CSV file in batched transactions. "
+        "The last committed line is stored in a checkpoint file so a failed import can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path of the JSONL or CSV file to import.")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help="File format (default: from the extension).")
+        parser.add_argument('--instructor', help="Username of the instructor for rows without an `instructor` column.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows per transaction.")
+        parser.add_argument('--checkpoint', help="Checkpoint file (default: <path>.checkpoint).")
+        parser.add_argument('--resume', action='store_true', help="Skip the lines committed by a previous run.")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"File '{path}' does not exist.")
+        checkpoint = Path(options['checkpoint'] or f"{path}.checkpoint")
+
+        default_instructor = None
+        if options['instructor']:
+            try:
+                default_instructor = User.objects.get(username=options['instructor'], role='instructor')
+            except User.DoesNotExist:
+                raise CommandError(f"Instructor '{options['instructor']}' does not exist.")
+
+        start_after = 0
+        if options['resume'] and checkpoint.exists():
+            start_after = int(checkpoint.read_text().strip() or 0)
+            self.stdout.write(f"Resuming after line {start_after}.")
+
+        importer = CourseImporter(default_instructor=default_instructor, batch_size=options['batch_size'])
+        fmt = detect_format(path, options['format'])
+        progress = {'last_line': start_after, 'imported': 0, 'rows_per_second': 0.0}
+        error_count = 0
+
+        with path.open(newline='', encoding='utf-8') as stream:
+            try:
+                for progress in importer.import_rows(read_rows(stream, fmt), start_after=start_after):
+                    checkpoint.write_text(str(progress['last_line']))
+                    for line_number, errors in progress['errors']:
+                        self.stderr.write(f"Line {line_number} skipped: {errors}")
+                    error_count += len(progress['errors'])
+                    self.stdout.write(
+                        f"Committed through line {progress['last_line']}: {progress['imported']} courses "
+                        f"({progress['rows_per_second']:.0f} rows/s)"
+                    )
+            except DatabaseError as e:
+                raise CommandError(
+                    f"Batch after line {progress['last_line']} failed and was rolled back: {e}. "
+                    f"Re-run with --resume to continue from the checkpoint."
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {progress['imported']} courses ({progress['rows_per_second']:.0f} rows/s), "
+            f"skipped {error_count} invalid rows."
+        ))
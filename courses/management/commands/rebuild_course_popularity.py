@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from courses.services.popularity import POPULARITY_WINDOWS, refresh_popularity
+
+
+class Command(BaseCommand):
+    help = "Recompute every course popularity ranking window, including all-time counts."
+
+    def handle(self, *args, **options):
+        refreshed = refresh_popularity(POPULARITY_WINDOWS.keys())
+        for window, count in refreshed.items():
+            self.stdout.write(f"{window}: {count} courses")
+        self.stdout.write(self.style.SUCCESS("Course popularity rebuilt."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Course
+from courses.services.rating_aggregates import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored rating aggregates of courses from their reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            action='append',
+            dest='course_ids',
+            help="ID of a course to rebuild (repeatable). Rebuilds every course when omitted.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Course.objects.all()
+        if options['course_ids']:
+            queryset = queryset.filter(pk__in=options['course_ids'])
+
+        updated = rebuild_rating_aggregates(queryset)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {updated} courses."))
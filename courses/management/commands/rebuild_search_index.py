@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.services.search import refresh_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Recompute the full-text search document of every course."
+
+    def handle(self, *args, **options):
+        updated = refresh_search_vectors()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the search document of {updated} courses."))
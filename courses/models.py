@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 # Create your models here.
@@ -11,14 +13,37 @@ class Course(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Running review aggregates, maintained by courses.services.rating_aggregates.
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(null=True, blank=True)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    # Weighted full-text document, maintained by courses.services.search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='course_search_vector_idx'),
+            GinIndex(fields=['title'], name='course_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['rating_average', 'id'], name='course_rating_avg_idx'),
+            models.Index(fields=['price', 'id'], name='course_price_idx'),
+            models.Index(fields=['created_at', 'id'], name='course_created_at_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], name='course_category_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews.exists():
-            return reviews.aggregate(models.Avg('rating'))['rating__avg']
-        return None
+        return self.rating_average
+
+    def rating_histogram(self):
+        return {star: getattr(self, f'rating_{star}_count') for star in range(1, 6)}
 
     def is_owned_by(self, user):
         return self.created_at == user
@@ -33,17 +58,76 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('user', 'course')
+        indexes = [
+            models.Index(fields=['course', 'enrolled_at'], name='enrollment_course_date_idx'),
+            models.Index(fields=['user', 'enrolled_at', 'id'], name='enrollment_user_date_idx'),
+            models.Index(fields=['enrolled_at', 'course'], name='enrollment_date_course_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} enrolled in {self.course.title}"
 
 
+class CoursePopularity(models.Model):
+    """
+    Precomputed enrollment count of a course within a ranking window.
+
+    Every window is incremented as enrollments happen; enrollments that age out of the
+    time-bounded windows are subtracted periodically by `courses.tasks.refresh_course_popularity`
+    (see `PopularityWindow`).
+    """
+    WINDOW_CHOICES = [
+        ('all', 'All time'),
+        ('7d', 'Last 7 days'),
+        ('30d', 'Last 30 days'),
+    ]
+
+    course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='popularity')
+    category = models.ForeignKey('categories.Category', on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='+')
+    window = models.CharField(max_length=3, choices=WINDOW_CHOICES)
+    enrollment_count = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Course popularity"
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'window'], name='unique_course_popularity_window'),
+        ]
+        indexes = [
+            models.Index(fields=['window', '-enrollment_count', 'course'], name='popularity_rank_idx'),
+            models.Index(fields=['window', 'category', '-enrollment_count', 'course'],
+                         name='popularity_category_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} ({self.window}): {self.enrollment_count}"
+
+
+class PopularityWindow(models.Model):
+    """
+    Expiry watermark of a time-bounded ranking window.
+
+    The `CoursePopularity` counts of the window cover the enrollments made at or after
+    `counted_since`; each refresh moves it forward and subtracts only the enrollments made
+    in between.
+    """
+    window = models.CharField(max_length=3, choices=CoursePopularity.WINDOW_CHOICES, primary_key=True)
+    counted_since = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.window} since {self.counted_since}"
+
+
 class Lesson(models.Model):
     title = models.CharField(max_length=255)
     course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='lessons')
     video = models.FileField(upload_to="lessons/videos/", blank=True, null=True)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Latest change, used to build the HTTP validators of lesson endpoints.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
\ No newline at end of file
@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CourseCursorPagination(CursorPagination):
+    """
+        Keyset pagination over courses, newest first.
+
+        Pages are fetched with `WHERE (created_at, id) < cursor`, so the cost of a page
+        does not depend on how deep into the result set it is.
+    """
+    ordering = ('-created_at', '-id')
+
+
+class EnrollmentCursorPagination(CursorPagination):
+    """
+        Keyset pagination over enrollments, most recent first.
+    """
+    ordering = ('-enrolled_at', '-id')
@@ -1,10 +1,37 @@
+from django.db import transaction
 from rest_framework import serializers
-from categories.models import Category, Tag
+from categories.models import Category
 from .models import Course, Enrollment, Lesson
+from .services.search import render_highlight
+from .services.tags import resolve_tags
 from categories.serializers import TagSerializer
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """
+        Lets a serializer declare the relations it reads, so views can load them up front.
+
+        Attributes:
+            - `select_related_fields`: Forward relations joined into the main query.
+            - `prefetch_related_fields`: Many-valued relations loaded with one extra query each.
+
+        Methods:
+            - `setup_eager_loading`: Applies the declared relations to a queryset, optionally
+              under a `prefix` when the serialized objects are reached through a relation.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, prefix=''):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*(prefix + field for field in cls.select_related_fields))
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*(prefix + field for field in cls.prefetch_related_fields))
+        return queryset
+
+
+class CourseSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
         Serializer for representing and managing course details.
 
@@ -15,15 +42,19 @@ class CourseSerializer(serializers.ModelSerializer):
             - `category`: Category of the course (linked by name).
             - `tags`: Tags associated with the course (optional).
             - `price`: Price of the course (mandatory).
+            - `average_rating`: Average review rating (read-only, `null` when unrated).
+            - `rating_count`: Number of reviews (read-only).
 
         Validations:
             - Ensures the provided category exists.
-            - Ensures unique tags are created or linked to the course.
+            - Ensures unique tags are created or linked to the course, resolving all of them
+              with one lookup and one bulk insert.
 
         Methods:
             - `validate_category`: Validates and fetches categorized information by name.
             - `create`: Creates a course with associated tags and instructor details.
-            - `update`: Updates course information and tags.
+            - `update`: Updates course information and tags. Only added or removed tags touch the
+              tag through table, and partial updates without `tags` leave them unchanged.
     """
     category = serializers.CharField(
         write_only=True,
@@ -35,10 +66,14 @@ class CourseSerializer(serializers.ModelSerializer):
         decimal_places=2,
         required=True
     )
+    average_rating = serializers.FloatField(source='rating_average', read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
+
+    prefetch_related_fields = ('tags',)
 
     class Meta:
         model = Course
-        fields = ['id', 'title', 'description', 'category', 'tags', 'price']
+        fields = ['id', 'title', 'description', 'category', 'tags', 'price', 'average_rating', 'rating_count']
 
     def validate_category(self, value):
         try:
@@ -48,41 +83,60 @@ class CourseSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Category '{value}' does not exist. Please select an existing category.")
 
     def create(self, validated_data):
-        category_name = validated_data.pop('category')
+        category = validated_data.pop('category')
         tags_data = validated_data.pop('tags', [])
         instructor = self.context['request'].user
-        category = Category.objects.get(name=category_name)
-        course = Course.objects.create(instructor=instructor, category=category, **validated_data)
-        for tag_data in tags_data:
-            if isinstance(tag_data, Tag):
-                course.tags.add(tag_data)
-            elif isinstance(tag_data, dict) and 'name' in tag_data:
-                tag, _ = Tag.objects.get_or_create(name=tag_data['name'])
-                course.tags.add(tag)
+        with transaction.atomic():
+            course = Course.objects.create(instructor=instructor, category=category, **validated_data)
+            course.tags.set(resolve_tags(tag_data['name'] for tag_data in tags_data))
         return course
 
     def update(self, instance, validated_data):
-        category_name = validated_data.pop('category', None)
-        tags_data = validated_data.pop('tags', [])
-        if category_name:
-            category = Category.objects.get(name=category_name)
+        category = validated_data.pop('category', None)
+        tags_data = validated_data.pop('tags', None)
+        if category:
             instance.category = category
         instance.title = validated_data.get('title', instance.title)
         instance.description = validated_data.get('description', instance.description)
         instance.price = validated_data.get('price', instance.price)
-        instance.save()
-        instance.tags.clear()
-
-        for tag_data in tags_data:
-            if isinstance(tag_data, Tag):
-                instance.tags.add(tag_data)
-            elif isinstance(tag_data, dict) and 'name' in tag_data:
-                tag, _ = Tag.objects.get_or_create(name=tag_data['name'])
-                instance.tags.add(tag)
+        with transaction.atomic():
+            instance.save()
+            if tags_data is not None or not self.partial:
+                instance.tags.set(resolve_tags(tag_data['name'] for tag_data in tags_data or []))
         return instance
 
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class HighlightField(serializers.CharField):
+    """
+        Read-only field rendering a search headline as HTML, see `render_highlight`.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return render_highlight(value)
+
+
+class CourseSearchResultSerializer(CourseSerializer):
+    """
+        Serializer for course search results.
+
+        Fields:
+            - All `CourseSerializer` fields.
+            - `rank`: Relevance of the course for the query (read-only).
+            - `title_highlight`: HTML-escaped title with matching terms wrapped in `<mark>` tags (read-only).
+            - `snippet`: Description fragments around the matches, escaped and highlighted the same way (read-only).
+    """
+    rank = serializers.FloatField(read_only=True)
+    title_highlight = HighlightField()
+    snippet = HighlightField()
+
+    class Meta(CourseSerializer.Meta):
+        fields = CourseSerializer.Meta.fields + ['rank', 'title_highlight', 'snippet']
+
+
+class EnrollmentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
         Serializer for representing enrollment details.
 
@@ -94,11 +148,32 @@ class EnrollmentSerializer(serializers.ModelSerializer):
     """
     course = CourseSerializer()
 
+    select_related_fields = ('course',)
+    prefetch_related_fields = tuple(f'course__{field}' for field in CourseSerializer.prefetch_related_fields)
+
     class Meta:
         model = Enrollment
         fields = ['course', 'enrolled_at', 'progress', 'completed']
 
 
+class EnrollmentStateSerializer(serializers.ModelSerializer):
+    """
+        Serializer for the per-user part of an enrollment, without the course details.
+
+        Cached enrollment pages store these rows and reference courses by ID, so a course
+        edit and an enrollment change invalidate different entries.
+
+        Fields:
+            - `course_id`: ID of the enrolled course.
+            - `enrolled_at`, `progress` and `completed`: As in `EnrollmentSerializer`.
+    """
+    course_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = ['course_id', 'enrolled_at', 'progress', 'completed']
+
+
 class LessonSerializer(serializers.ModelSerializer):
     """
         Serializer for managing lesson details.
@@ -126,7 +201,7 @@ class LessonSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class PopularCourseSerializer(serializers.ModelSerializer):
+class PopularCourseSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
         Serializer for retrieving popular course details.
 
@@ -0,0 +1,288 @@
+import csv
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework import serializers
+
+from categories.models import Category
+from courses.cache import bump_catalog_generation
+from courses.models import Course, Lesson
+from courses.serializers import CourseSerializer
+from courses.services.search import refresh_search_vectors
+from courses.services.tags import resolve_tags
+
+User = get_user_model()
+
+CSV_FIELDS = ['title', 'description', 'category', 'price', 'instructor', 'tags', 'lessons']
+DEFAULT_BATCH_SIZE = 500
+
+
+def detect_format(path, fmt=None):
+    """
+    Return the catalog file format ("jsonl" or "csv"), from `fmt` or the file extension.
+    """
+    if fmt:
+        return fmt
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(stream, fmt):
+    """
+    Yield `(line_number, row)` pairs from a JSONL or CSV catalog stream.
+
+    CSV rows carry `tags` as a comma-separated list and `lessons` as a JSON array.
+    Malformed rows are yielded as a `ValueError` instead of a dict.
+    """
+    if fmt == 'csv':
+        for line_number, row in enumerate(csv.DictReader(stream), start=1):
+            try:
+                tags = [name.strip() for name in (row.get('tags') or '').split(',') if name.strip()]
+                row['tags'] = [{'name': name} for name in tags]
+                row['lessons'] = json.loads(row['lessons']) if row.get('lessons') else []
+            except ValueError as e:
+                yield line_number, ValueError(f"Invalid lessons column: {e}")
+                continue
+            yield line_number, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError("Each line must be a JSON object.")
+            continue
+        tags = row.get('tags') or []
+        row['tags'] = [tag if isinstance(tag, dict) else {'name': tag} for tag in tags]
+        yield line_number, row
+
+
+class ImportLessonSerializer(serializers.ModelSerializer):
+    """
+        Validates a lesson nested in an imported course row.
+    """
+    class Meta:
+        model = Lesson
+        fields = ['title', 'content']
+
+
+class ImportCourseSerializer(CourseSerializer):
+    """
+        Validates an imported course row with the regular `CourseSerializer` rules.
+
+        Categories and instructors are resolved from lookups preloaded per batch
+        (`categories` and `instructors` in the context) instead of one query per row.
+    """
+    instructor = serializers.CharField(write_only=True, required=False)
+    lessons = ImportLessonSerializer(many=True, required=False)
+
+    class Meta(CourseSerializer.Meta):
+        fields = CourseSerializer.Meta.fields + ['instructor', 'lessons']
+
+    def validate_category(self, value):
+        category = self.context['categories'].get(value)
+        if category is None:
+            raise serializers.ValidationError(f"Category '{value}' does not exist. Please select an existing category.")
+        return category
+
+    def validate_instructor(self, value):
+        instructor = self.context['instructors'].get(value)
+        if instructor is None or not instructor.is_instructor:
+            raise serializers.ValidationError(f"Instructor '{value}' does not exist.")
+        return instructor
+
+    def validate(self, data):
+        if 'instructor' not in data:
+            default_instructor = self.context.get('default_instructor')
+            if default_instructor is None:
+                raise serializers.ValidationError({'instructor': "This field is required."})
+            data['instructor'] = default_instructor
+        return data
+
+
+class CourseImporter:
+    """
+        Imports courses, tags and lessons in batched transactions.
+
+        Initialization Args:
+            - `default_instructor` (optional): Instructor for rows without an `instructor` column.
+            - `batch_size` (optional): Rows written per transaction.
+
+        Features:
+            - Validates each row with the `CourseSerializer` rules (category must exist, tags get created).
+            - Writes each batch with `bulk_create` for courses, tag links and lessons.
+            - Reports the last committed line so a failed import can be resumed.
+
+        Methods:
+            - `import_rows`: Validates and writes `(line_number, row)` pairs, yielding a progress
+              report after every committed batch.
+            - `write_batch`: Writes one batch of validated rows in a single transaction.
+    """
+    def __init__(self, default_instructor=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.default_instructor = default_instructor
+        self.batch_size = batch_size
+
+    def _validate_batch(self, rows):
+        category_names = {row.get('category') for _, row in rows}
+        usernames = {row.get('instructor') for _, row in rows if row.get('instructor')}
+        context = {
+            'categories': {category.name: category for category in Category.objects.filter(name__in=category_names)},
+            'instructors': {user.username: user for user in User.objects.filter(username__in=usernames)},
+            'default_instructor': self.default_instructor,
+        }
+
+        valid, errors = [], []
+        for line_number, row in rows:
+            serializer = ImportCourseSerializer(data=row, context=context)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+            else:
+                errors.append((line_number, serializer.errors))
+        return valid, errors
+
+    def write_batch(self, validated_rows):
+        """
+        Write validated course rows with one `bulk_create` per table, inside one transaction.
+
+        Returns:
+            list: The created `Course` objects.
+        """
+        with transaction.atomic():
+            courses = Course.objects.bulk_create([
+                Course(
+                    title=row['title'],
+                    description=row['description'],
+                    price=row['price'],
+                    category=row['category'],
+                    instructor=row['instructor'],
+                )
+                for row in validated_rows
+            ])
+
+            tags = {tag.name: tag for tag in resolve_tags(
+                tag['name'] for row in validated_rows for tag in row.get('tags', [])
+            )}
+            course_tags = Course.tags.through
+            course_tags.objects.bulk_create([
+                course_tags(course_id=course.id, tag_id=tags[tag['name']].id)
+                for course, row in zip(courses, validated_rows)
+                for tag in {tag['name']: tag for tag in row.get('tags', [])}.values()
+            ], ignore_conflicts=True)
+
+            Lesson.objects.bulk_create([
+                Lesson(course=course, title=lesson['title'], content=lesson['content'])
+                for course, row in zip(courses, validated_rows)
+                for lesson in row.get('lessons', [])
+            ], batch_size=self.batch_size)
+
+            # bulk_create skips model signals, so refresh derived data explicitly.
+            refresh_search_vectors(course.id for course in courses)
+            transaction.on_commit(bump_catalog_generation)
+        return courses
+
+    def import_rows(self, rows, start_after=0):
+        """
+        Validate and import rows batch by batch.
+
+        Args:
+            rows (Iterable): `(line_number, row)` pairs, e.g. from `read_rows`.
+            start_after (int, optional): Skip rows up to and including this line number.
+
+        Yields:
+            dict: Progress after each committed batch with `last_line` (the last line covered
+            by the commit), the running `imported` total, the batch `errors` (line number and
+            messages) and `rows_per_second`.
+        """
+        started = time.monotonic()
+        imported = 0
+        batch = []
+        errors = []
+        last_line = start_after
+
+        def progress():
+            elapsed = time.monotonic() - started
+            return {
+                'last_line': last_line,
+                'imported': imported,
+                'errors': errors,
+                'rows_per_second': imported / elapsed if elapsed else 0.0,
+            }
+
+        for line_number, row in rows:
+            if line_number <= start_after:
+                continue
+            if isinstance(row, Exception):
+                errors.append((line_number, str(row)))
+            else:
+                batch.append((line_number, row))
+            last_line = line_number
+
+            if len(batch) >= self.batch_size:
+                valid, batch_errors = self._validate_batch(batch)
+                errors.extend(batch_errors)
+                if valid:
+                    self.write_batch(valid)
+                imported += len(valid)
+                yield progress()
+                batch, errors = [], []
+
+        if batch:
+            valid, batch_errors = self._validate_batch(batch)
+            errors.extend(batch_errors)
+            if valid:
+                self.write_batch(valid)
+            imported += len(valid)
+        if batch or errors:
+            yield progress()
+
+
+def iter_export_rows(queryset=None, chunk_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield courses as import-compatible dicts, reading them through a server-side cursor.
+    """
+    if queryset is None:
+        queryset = Course.objects.all()
+    queryset = queryset.select_related('category', 'instructor').prefetch_related('tags', 'lessons').order_by('id')
+
+    for course in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'title': course.title,
+            'description': course.description,
+            'category': course.category.name if course.category else None,
+            'price': str(course.price),
+            'instructor': course.instructor.username,
+            'tags': [tag.name for tag in course.tags.all()],
+            'lessons': [{'title': lesson.title, 'content': lesson.content} for lesson in course.lessons.all()],
+        }
+
+
+def write_rows(rows, stream, fmt):
+    """
+    Write exported course dicts to a stream as JSONL or CSV.
+
+    Returns:
+        int: The number of rows written.
+    """
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                **row,
+                'tags': ','.join(row['tags']),
+                'lessons': json.dumps(row['lessons']),
+            })
+            count += 1
+        return count
+
+    for row in rows:
+        stream.write(json.dumps(row) + '\n')
+        count += 1
+    return count
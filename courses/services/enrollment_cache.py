@@ -0,0 +1,87 @@
+from courses.cache import (
+    course_payload_cache_key, enrollments_cache, enrollments_cache_key, get_course_versions,
+    get_user_enrollments_version,
+)
+from courses.models import Course, Enrollment
+from courses.pagination import EnrollmentCursorPagination
+from courses.serializers import CourseSerializer, EnrollmentStateSerializer
+from edunexus.cached_compute import cached_compute, describe_request
+
+
+def get_enrollment_rows(user_id, request):
+    """
+    Build one page of a user's enrollments without the course details, with one query.
+
+    Args:
+        user_id (int): The enrolled user.
+        request (Request): The request carrying the page cursor.
+
+    Returns:
+        dict: The `next` and `previous` links and the `results` rows, each with a `course_id`.
+    """
+    paginator = EnrollmentCursorPagination()
+    enrollments = Enrollment.objects.filter(user_id=user_id).values(
+        'id', 'course_id', 'enrolled_at', 'progress', 'completed'
+    )
+    page = paginator.paginate_queryset(enrollments, request)
+    return paginator.get_paginated_response(EnrollmentStateSerializer(page, many=True).data).data
+
+
+def get_course_payloads(course_ids):
+    """
+    Return the serialized course of each ID, reusing the cached payloads of unchanged courses.
+
+    Payloads are cached under the course version, so only courses edited since they were
+    cached are loaded again, all with one query.
+
+    Returns:
+        dict: The serialized courses keyed by ID (deleted courses are left out).
+    """
+    keys = {course_id: course_payload_cache_key(course_id, version)
+            for course_id, version in get_course_versions(course_ids).items()}
+    cached = enrollments_cache().get_many(keys.values())
+    payloads = {course_id: cached[key] for course_id, key in keys.items() if key in cached}
+
+    missing = [course_id for course_id in keys if course_id not in payloads]
+    if missing:
+        courses = CourseSerializer.setup_eager_loading(Course.objects.filter(id__in=missing))
+        loaded = {course.id: CourseSerializer(course).data for course in courses}
+        enrollments_cache().set_many({keys[course_id]: payload for course_id, payload in loaded.items()})
+        payloads.update(loaded)
+    return payloads
+
+
+def get_enrollment_page(request, user_id):
+    """
+    Return a page of a user's enrollments with their courses, through the cache.
+
+    The page is assembled from two kinds of entries:
+
+    - The enrollment rows of the page, cached under the user's enrollments version, which
+      any enrollment write bumps (see `courses.cache.invalidate_user_enrollments`).
+    - One payload per course, cached under the course version, which course, tag and rating
+      changes bump (see `courses.cache.bump_course_versions`).
+
+    A new enrollment therefore only reloads the enrollment rows, and a course edit only
+    reloads that course, for every user enrolled in it.
+
+    Returns:
+        dict: The `next` and `previous` links and the `results` in `EnrollmentSerializer` format.
+    """
+    cursor = request.query_params.get(EnrollmentCursorPagination.cursor_query_param, '')
+    rows = cached_compute(
+        'enrollments',
+        enrollments_cache_key(user_id, get_user_enrollments_version(user_id), cursor),
+        'courses.enrollments',
+        describe_request(request, user_id=user_id),
+        lambda: get_enrollment_rows(user_id, request),
+    )
+
+    payloads = get_course_payloads([row['course_id'] for row in rows['results']])
+    results = []
+    for row in rows['results']:
+        row = dict(row)
+        course_id = row.pop('course_id')
+        if course_id in payloads:
+            results.append({'course': payloads[course_id], **row})
+    return {'next': rows['next'], 'previous': rows['previous'], 'results': results}
@@ -0,0 +1,199 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from courses.models import Course, CoursePopularity, Enrollment, PopularityWindow
+
+POPULARITY_WINDOWS = {
+    'all': None,
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+TIME_WINDOWS = [window for window, span in POPULARITY_WINDOWS.items() if span is not None]
+BATCH_SIZE = 1000
+
+
+def ensure_popularity_rows(course_ids=None):
+    """
+    Create the missing ranking rows of the given courses (default is every course).
+
+    Args:
+        course_ids (Iterable[int], optional): IDs of the courses to check.
+
+    Returns:
+        int: The number of rows created.
+    """
+    courses = Course.objects.all()
+    if course_ids is not None:
+        courses = courses.filter(pk__in=course_ids)
+
+    created = 0
+    for window in POPULARITY_WINDOWS:
+        missing = courses.exclude(popularity__window=window).values_list('id', 'category_id')
+        rows = [
+            CoursePopularity(course_id=course_id, category_id=category_id, window=window)
+            for course_id, category_id in missing.iterator(chunk_size=BATCH_SIZE)
+        ]
+        CoursePopularity.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        created += len(rows)
+    return created
+
+
+def _window_starts(windows, now):
+    """
+    Return the start of each window: its expiry watermark, or `now - span` for a window
+    that has not been refreshed yet. The watermarks are locked until the transaction ends,
+    so a concurrent expiry cannot count the same enrollments again.
+    """
+    starts = {window: now - POPULARITY_WINDOWS[window] for window in windows}
+    starts.update(
+        PopularityWindow.objects.select_for_update().filter(window__in=windows).values_list('window', 'counted_since')
+    )
+    return starts
+
+
+def record_enrollments(course_ids):
+    """
+    Increment the popularity counters of every window for newly enrolled courses.
+
+    Args:
+        course_ids (Iterable[int]): One course ID per new enrollment (repeats count twice).
+    """
+    record_enrollment_delta(Counter(course_ids))
+
+
+def record_unenrollments(enrollments):
+    """
+    Decrement the popularity counters for removed enrollments, in the windows that still
+    count them: an enrollment older than 7 days is only removed from the `30d` and `all`
+    counts, for instance.
+
+    Args:
+        enrollments (Iterable[tuple]): `(course_id, enrolled_at)` per removed enrollment.
+    """
+    with transaction.atomic():
+        starts = _window_starts(TIME_WINDOWS, timezone.now())
+        deltas = {window: Counter() for window in POPULARITY_WINDOWS}
+        for course_id, enrolled_at in enrollments:
+            for window in POPULARITY_WINDOWS:
+                if window not in starts or enrolled_at >= starts[window]:
+                    deltas[window][course_id] -= 1
+        for window, window_deltas in deltas.items():
+            record_enrollment_delta(window_deltas, windows=[window])
+
+
+def record_enrollment_delta(deltas, windows=None):
+    """
+    Apply per-course enrollment count changes to ranking windows with `F()` updates.
+
+    Courses sharing the same delta are updated in a single statement.
+
+    Args:
+        deltas (dict): Maps a course ID to the change in its enrollment count.
+        windows (Iterable[str], optional): Windows to update (default is every window).
+    """
+    deltas = {course_id: delta for course_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    by_delta = {}
+    for course_id, delta in deltas.items():
+        by_delta.setdefault(delta, []).append(course_id)
+
+    with transaction.atomic():
+        ensure_popularity_rows(deltas.keys())
+        for delta, course_ids in by_delta.items():
+            rows = CoursePopularity.objects.filter(course_id__in=course_ids)
+            if windows is not None:
+                rows = rows.filter(window__in=windows)
+            if delta < 0:
+                rows = rows.filter(enrollment_count__gte=-delta)
+            rows.update(enrollment_count=F('enrollment_count') + delta)
+
+
+def expire_popularity(windows=None):
+    """
+    Subtract the enrollments that aged out of time-bounded windows since the last run.
+
+    Only enrollments made between a window's previous and new start are read, with one
+    aggregate over the `enrolled_at` index, so the cost follows the enrollment rate rather
+    than the size of the table. A window without a watermark yet is rebuilt once with
+    `refresh_popularity`.
+
+    Args:
+        windows (Iterable[str], optional): Windows to expire (default is every time-bounded window).
+
+    Returns:
+        dict: The number of courses updated per window.
+    """
+    now = timezone.now()
+    expired = {}
+    for window in windows or TIME_WINDOWS:
+        start = now - POPULARITY_WINDOWS[window]
+        with transaction.atomic():
+            state = PopularityWindow.objects.select_for_update().filter(window=window).first()
+            if state is None:
+                expired[window] = refresh_popularity([window])[window]
+                continue
+            if start <= state.counted_since:
+                expired[window] = 0
+                continue
+
+            aged = (
+                Enrollment.objects.filter(enrolled_at__gte=state.counted_since, enrolled_at__lt=start)
+                .order_by().values('course_id').annotate(total=Count('id')).values_list('course_id', 'total')
+            )
+            deltas = {course_id: -total for course_id, total in aged}
+            record_enrollment_delta(deltas, windows=[window])
+            state.counted_since = start
+            state.save(update_fields=['counted_since', 'updated_at'])
+            expired[window] = len(deltas)
+    return expired
+
+
+def refresh_popularity(windows=None):
+    """
+    Recompute ranking windows from enrollments with one set-based `UPDATE` per window.
+
+    This scans every enrollment of the window, so it is meant for repairs (see the
+    `rebuild_course_popularity` command) and for starting a window; `expire_popularity`
+    keeps the windows current after that. Time-bounded windows get a new watermark.
+
+    Args:
+        windows (Iterable[str], optional): Windows to recompute (default is the time-bounded
+            windows; the all-time window is maintained incrementally).
+
+    Returns:
+        dict: The number of rows refreshed per window.
+    """
+    windows = list(TIME_WINDOWS if windows is None else windows)
+
+    ensure_popularity_rows()
+    now = timezone.now()
+    course_category = Course.objects.filter(pk=OuterRef('course_id')).values('category_id')
+
+    refreshed = {}
+    for window in windows:
+        enrollments = Enrollment.objects.filter(course_id=OuterRef('course_id')).order_by()
+        span = POPULARITY_WINDOWS[window]
+        if span is not None:
+            enrollments = enrollments.filter(enrolled_at__gte=now - span)
+        enrollment_count = enrollments.values('course_id').annotate(total=Count('id')).values('total')
+
+        with transaction.atomic():
+            if span is not None:
+                # Lock the watermark first, so refunds and expiries wait for the new counts.
+                PopularityWindow.objects.update_or_create(window=window, defaults={'counted_since': now - span})
+            refreshed[window] = CoursePopularity.objects.filter(window=window).update(
+                enrollment_count=Coalesce(Subquery(enrollment_count), Value(0)),
+                category_id=Subquery(course_category),
+                refreshed_at=now,
+            )
+
+    # Keep the category of the other windows in sync with course edits.
+    CoursePopularity.objects.exclude(window__in=windows).update(category_id=Subquery(course_category))
+    return refreshed
@@ -0,0 +1,103 @@
+from django.db import transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from courses.cache import bump_course_versions
+from courses.models import Course
+from reviews.models import Review
+
+RATING_STARS = range(1, 6)
+
+
+def _average_expression(count, total):
+    """
+    Build the SQL expression for the average rating, or NULL when there are no reviews.
+    """
+    return Cast(total, FloatField()) / NullIf(count, Value(0))
+
+
+def apply_rating_delta(course_id, star_deltas):
+    """
+    Apply a change in review ratings to the running aggregates of a course.
+
+    The update is a single `UPDATE` built from `F()` expressions, so concurrent
+    review writes never lose each other's changes.
+
+    Args:
+        course_id (int): The ID of the reviewed course.
+        star_deltas (dict): Maps a star value (1-5) to the change in its review count.
+    """
+    star_deltas = {star: delta for star, delta in star_deltas.items() if delta}
+    if not star_deltas:
+        return
+
+    count_delta = sum(star_deltas.values())
+    sum_delta = sum(star * delta for star, delta in star_deltas.items())
+    new_count = F('rating_count') + count_delta
+    new_sum = F('rating_sum') + sum_delta
+
+    updates = {
+        'rating_count': new_count,
+        'rating_sum': new_sum,
+        'rating_average': _average_expression(new_count, new_sum),
+    }
+    for star, delta in star_deltas.items():
+        field = f'rating_{star}_count'
+        updates[field] = F(field) + delta
+
+    Course.objects.filter(pk=course_id).update(**updates)
+    # Ratings are part of the course payload cached in enrollment pages.
+    transaction.on_commit(lambda: bump_course_versions([course_id]))
+
+
+def record_review_created(review):
+    """Add a newly created review to its course aggregates."""
+    apply_rating_delta(review.course_id, {review.rating: 1})
+
+
+def record_review_updated(review, previous_rating):
+    """Move an edited review from its previous rating bucket to the new one."""
+    if previous_rating == review.rating:
+        return
+    apply_rating_delta(review.course_id, {previous_rating: -1, review.rating: 1})
+
+
+def record_review_deleted(review):
+    """Remove a deleted review from its course aggregates."""
+    apply_rating_delta(review.course_id, {review.rating: -1})
+
+
+def _review_stat(aggregate, **filters):
+    reviews = Review.objects.filter(course=OuterRef('pk'), **filters).order_by()
+    return Coalesce(
+        Subquery(reviews.values('course').annotate(value=aggregate).values('value')),
+        Value(0),
+    )
+
+
+def rebuild_rating_aggregates(queryset=None):
+    """
+    Recompute the rating aggregates of courses from their reviews.
+
+    Args:
+        queryset (QuerySet, optional): Courses to rebuild (default is every course).
+
+    Returns:
+        int: The number of courses updated.
+    """
+    if queryset is None:
+        queryset = Course.objects.all()
+
+    updates = {
+        'rating_count': _review_stat(Count('id')),
+        'rating_sum': _review_stat(Sum('rating')),
+    }
+    for star in RATING_STARS:
+        updates[f'rating_{star}_count'] = _review_stat(Count('id'), rating=star)
+
+    with transaction.atomic():
+        updated = queryset.update(**updates)
+        queryset.update(rating_average=_average_expression(F('rating_count'), F('rating_sum')))
+        course_ids = list(queryset.values_list('id', flat=True))
+        transaction.on_commit(lambda: bump_course_versions(course_ids))
+    return updated
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+from django.utils.html import escape
+
+from courses.models import Course, Lesson
+
+User = get_user_model()
+
+# Matches are delimited with control characters, not markup: the title and description are
+# plain text written by instructors, so they are HTML-escaped before the delimiters become
+# `<mark>` tags (see `render_highlight`).
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+HEADLINE_OPTIONS = {
+    'start_sel': HIGHLIGHT_START,
+    'stop_sel': HIGHLIGHT_STOP,
+    'max_words': 35,
+    'min_words': 15,
+    'max_fragments': 2,
+}
+
+
+def _config():
+    return settings.COURSE_SEARCH_CONFIG
+
+
+def _joined(queryset, field):
+    """
+    Concatenate `field` over a related queryset into one text value per course.
+    """
+    aggregated = queryset.order_by().values('course_id').annotate(text=StringAgg(field, ' ')).values('text')
+    return Coalesce(Subquery(aggregated), Value(''), output_field=TextField())
+
+
+def search_document():
+    """
+    Build the weighted search document of a course.
+
+    Weights:
+        - A: title.
+        - B: tag names and the instructor's username.
+        - C: description.
+        - D: lesson content.
+    """
+    config = _config()
+    tags = _joined(Course.tags.through.objects.filter(course_id=OuterRef('pk')), 'tag__name')
+    instructor = Coalesce(
+        Subquery(User.objects.filter(pk=OuterRef('instructor_id')).values('username')), Value(''),
+        output_field=TextField(),
+    )
+    lessons = _joined(Lesson.objects.filter(course_id=OuterRef('pk')), 'content')
+
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(tags, instructor, weight='B', config=config)
+        + SearchVector('description', weight='C', config=config)
+        + SearchVector(lessons, weight='D', config=config)
+    )
+
+
+def refresh_search_vectors(course_ids=None):
+    """
+    Recompute the stored search document of courses with one `UPDATE`.
+
+    Args:
+        course_ids (Iterable[int], optional): Courses to refresh (default is every course).
+
+    Returns:
+        int: The number of courses updated.
+    """
+    courses = Course.objects.all()
+    if course_ids is not None:
+        courses = courses.filter(pk__in=list(course_ids))
+    return courses.update(search_vector=search_document())
+
+
+def render_highlight(headline):
+    """
+    Turn a `SearchHeadline` result into safe HTML: the text is escaped and only the match
+    delimiters become `<mark>` tags.
+    """
+    return escape(headline).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+
+
+def search_courses(queryset, text):
+    """
+    Filter courses matching a web-style search query, ranked by relevance.
+
+    The query supports quoted phrases, `or` and `-excluded` terms. Each result is
+    annotated with `rank`, a highlighted `title_highlight` and a description `snippet`,
+    whose matches are delimited with `HIGHLIGHT_START` / `HIGHLIGHT_STOP` (see `render_highlight`).
+    """
+    config = _config()
+    query = SearchQuery(text, search_type='websearch', config=config)
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query),
+        title_highlight=SearchHeadline('title', query, config=config, highlight_all=True,
+                                       start_sel=HEADLINE_OPTIONS['start_sel'],
+                                       stop_sel=HEADLINE_OPTIONS['stop_sel']),
+        snippet=SearchHeadline('description', query, config=config, **HEADLINE_OPTIONS),
+    ).order_by('-rank', 'id')
@@ -0,0 +1,27 @@
+from categories.models import Tag
+
+
+def resolve_tags(names):
+    """
+    Fetch the tags with the given names, creating the missing ones in bulk.
+
+    Existing tags are read with one `IN` query and missing ones are inserted with a
+    single `bulk_create(ignore_conflicts=True)`, so a concurrent writer creating the
+    same tag is harmless.
+
+    Args:
+        names (Iterable[str]): Tag names; duplicates are ignored.
+
+    Returns:
+        list: The `Tag` objects, in the order their names were first given.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+    return [tags[name] for name in names]
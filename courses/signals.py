@@ -0,0 +1,129 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from categories.models import Category, Tag
+from courses.cache import bump_catalog_generation, bump_course_versions, invalidate_user_enrollments
+from courses.models import Course, CoursePopularity, Enrollment, Lesson
+from courses.services.popularity import ensure_popularity_rows
+from courses.services.search import refresh_search_vectors
+from courses.tasks import refresh_course_search_vectors
+from reviews.models import Review
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(m2m_changed, sender=Course.tags.through)
+def invalidate_catalog_cache(sender, **kwargs):
+    """
+        Signal receiver that invalidates cached catalog responses after a catalog write.
+
+        The generation bump is deferred until the surrounding transaction commits,
+        so a concurrent reader can never cache data that is about to be rolled back.
+    """
+    if kwargs.get('action', 'post_').startswith('pre_'):
+        return
+    transaction.on_commit(bump_catalog_generation)
+
+
+def _bump_course_versions_on_commit(course_ids):
+    course_ids = list(course_ids)
+    if course_ids:
+        transaction.on_commit(lambda: bump_course_versions(course_ids))
+
+
+@receiver(post_save, sender=Course)
+def sync_course_popularity(sender, instance, created, **kwargs):
+    """
+        Signal receiver that creates the ranking rows of a new course and keeps their
+        category in sync with course edits, so the periodic refresh does not have to.
+    """
+    if created:
+        ensure_popularity_rows([instance.pk])
+    else:
+        CoursePopularity.objects.filter(course=instance).exclude(category_id=instance.category_id).update(
+            category_id=instance.category_id
+        )
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_user_enrollments_cache(sender, instance, **kwargs):
+    """
+        Signal receiver that invalidates the cached enrollment pages of the user of a
+        created, updated (e.g. progress) or deleted enrollment.
+
+        Bulk writes skip this receiver and invalidate explicitly (see `orders.services`).
+    """
+    user_ids = [instance.user_id]
+    transaction.on_commit(lambda: invalidate_user_enrollments(user_ids))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_enrollment_payload(sender, instance, **kwargs):
+    """
+        Signal receiver that invalidates the cached course payload shown in enrollment pages.
+    """
+    _bump_course_versions_on_commit([instance.pk])
+
+
+def _refresh_search_on_commit(course_ids):
+    course_ids = list(course_ids)
+    if course_ids:
+        transaction.on_commit(lambda: refresh_search_vectors(course_ids))
+
+
+@receiver(post_save, sender=Course)
+def update_course_search_vector(sender, instance, **kwargs):
+    """
+        Signal receiver that refreshes the search document of a saved course.
+    """
+    _refresh_search_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def update_lesson_course_search_vector(sender, instance, **kwargs):
+    """
+        Signal receiver that refreshes the search document of a lesson's course.
+    """
+    _refresh_search_on_commit([instance.course_id])
+
+
+@receiver(m2m_changed, sender=Course.tags.through)
+def update_tagged_courses_search_vector(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+        Signal receiver that refreshes the search document and the cached enrollment payload
+        of courses whose tags changed.
+    """
+    if not action.startswith('post_'):
+        return
+    course_ids = [instance.pk] if not reverse else pk_set or []
+    _refresh_search_on_commit(course_ids)
+    _bump_course_versions_on_commit(course_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def update_tag_courses_search_vector(sender, instance, created=False, **kwargs):
+    """
+        Signal receiver that queues a search refresh for every course of a renamed or deleted tag
+        and invalidates their cached enrollment payloads.
+
+        A tag can be attached to many courses, so the refresh runs in a Celery task.
+    """
+    if created:
+        return
+    # Collected before the delete runs, since the tag links are removed along with the tag.
+    course_ids = list(instance.courses.values_list('id', flat=True))
+    if course_ids:
+        transaction.on_commit(lambda: refresh_course_search_vectors.delay(course_ids))
+    _bump_course_versions_on_commit(course_ids)
+
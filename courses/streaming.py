@@ -0,0 +1,49 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+STREAM_CHUNK_SIZE = 500
+
+
+def wants_ndjson_stream(request):
+    """
+    Check whether the client opted into NDJSON streaming with `?stream=ndjson`.
+    """
+    return request.query_params.get('stream') == 'ndjson'
+
+
+def _iter_chunks(queryset, chunk_size):
+    chunk = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_ndjson(queryset, serializer_class, context=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream a queryset as newline-delimited JSON, one serialized object per line.
+
+    Rows are read through a server-side cursor and serialized chunk by chunk, so
+    memory use stays constant regardless of the number of rows.
+
+    Args:
+        queryset (QuerySet): The rows to stream, already filtered and ordered.
+        serializer_class (Serializer): Serializer used for each row.
+        context (dict, optional): Serializer context (e.g., the request).
+        chunk_size (int, optional): Rows fetched and serialized per round trip.
+
+    Returns:
+        StreamingHttpResponse: The NDJSON response.
+    """
+    def lines():
+        for chunk in _iter_chunks(queryset, chunk_size):
+            for item in serializer_class(chunk, many=True, context=context).data:
+                yield json.dumps(item, cls=JSONEncoder) + '\n'
+
+    return StreamingHttpResponse(lines(), content_type=NDJSON_CONTENT_TYPE)
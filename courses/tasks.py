@@ -0,0 +1,39 @@
+from celery import shared_task
+
+from courses.services.popularity import expire_popularity
+from courses.services.search import refresh_search_vectors
+
+
+@shared_task
+def refresh_course_popularity(windows=None):
+    """
+        Task to remove the enrollments that aged out of the time-bounded popularity
+        rankings since the last run (see `courses.services.popularity.expire_popularity`).
+
+        Args:
+            windows (list, optional): Ranking windows to refresh (default is the
+                time-bounded windows, e.g. "7d" and "30d").
+
+        Returns:
+            str: Status message with the number of updated courses per window.
+    """
+    refreshed = expire_popularity(windows)
+    summary = ", ".join(f"{window}: {count}" for window, count in refreshed.items())
+    return f"Refreshed course popularity ({summary})."
+
+
+@shared_task
+def refresh_course_search_vectors(course_ids):
+    """
+        Task to recompute the full-text search document of courses.
+
+        Used for writes that can touch many courses at once, such as renaming a tag.
+
+        Args:
+            course_ids (list): IDs of the courses to refresh.
+
+        Returns:
+            str: Status message with the number of refreshed courses.
+    """
+    updated = refresh_search_vectors(course_ids)
+    return f"Refreshed the search document of {updated} courses."
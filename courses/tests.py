@@ -1,3 +1,319 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import redis
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from categories.models import Category, Tag
+from courses.cache import (
+    CATALOG_GENERATION_KEY, ENROLLMENT_VERSION_TIMEOUT, bump_course_versions, catalog_cache, catalog_tier,
+    enrollments_cache, get_course_versions, get_user_enrollments_version, invalidate_user_enrollments,
+)
+from courses.computations import course_list, user_enrollment_rows
+from courses.models import Course, CoursePopularity, Enrollment
+from courses.services.popularity import expire_popularity, refresh_popularity
+from edunexus.testing import assert_queries_do_not_scale, clear_caches
+from edunexus.tiered_cache import TieredCache
+from users.models import CustomUser
+
+
+class CourseListQueryCountTests(TestCase):
+    """
+        Regression checks that course list filters and ordering run in SQL: the number of
+        queries per request stays the same when the catalog doubles.
+    """
+    def setUp(self):
+        clear_caches()
+        self.instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        self.category = Category.objects.create(name='Programming')
+        self.tag = Tag.objects.create(name='python')
+
+    def create_courses(self, count):
+        for index in range(Course.objects.count(), count):
+            course = Course.objects.create(
+                title=f'Course {index}',
+                description='Description',
+                instructor=self.instructor,
+                category=self.category,
+                price=Decimal('10.00') + index,
+                rating_count=1,
+                rating_sum=4,
+                rating_average=4.0,
+            )
+            course.tags.add(self.tag)
+        # Measure the database, not the response caches.
+        clear_caches()
+        catalog_tier.local.clear()
+
+    def test_filtered_list_query_count_does_not_grow_with_catalog(self):
+        url = '/courses/?min_rating=3&tags=python&category=Program&ordering=-rating,price'
+        assert_queries_do_not_scale(self, self.create_courses, lambda: self.client.get(url), sizes=(4, 8))
+
+    def test_filtered_list_returns_matching_courses_in_order(self):
+        self.create_courses(3)
+        Course.objects.filter(title='Course 0').update(rating_average=2.0)
+        clear_caches()
+        catalog_tier.local.clear()
+
+        response = self.client.get('/courses/?min_rating=3&tags=python&ordering=-price')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([course['title'] for course in response.data['results']], ['Course 2', 'Course 1'])
+
+    def test_etag_follows_bump_missed_by_this_process(self):
+        self.create_courses(1)
+        first = self.client.get('/courses/')
+        # Another worker bumps the generation; this process never hears about it.
+        catalog_cache().incr(CATALOG_GENERATION_KEY)
+
+        second = self.client.get('/courses/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+
+class EagerLoadingQueryCountTests(TestCase):
+    """
+        Checks that course endpoints load the relations of their serializers up front, so
+        nested courses and tags do not add queries per row.
+    """
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(username='student', email='student@example.com', password='password')
+        self.instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        self.category = Category.objects.create(name='Programming')
+        self.tags = [Tag.objects.create(name=name) for name in ('python', 'django')]
+
+    def create_courses(self, count):
+        courses = []
+        for index in range(Course.objects.count(), count):
+            course = Course.objects.create(
+                title=f'Course {index}', description='Description', instructor=self.instructor,
+                category=self.category, price=Decimal('10.00'),
+            )
+            course.tags.add(*self.tags)
+            courses.append(course)
+        return courses
+
+    def uncached(self, grow):
+        def grow_and_clear(size):
+            grow(size)
+            clear_caches()
+            catalog_tier.local.clear()
+        return grow_and_clear
+
+    def test_course_list(self):
+        assert_queries_do_not_scale(self, self.uncached(self.create_courses), lambda: self.client.get('/courses/'))
+
+    def test_list_enrollments(self):
+        def enroll(size):
+            for course in self.create_courses(size):
+                Enrollment.objects.create(user=self.student, course=course)
+
+        self.client.force_authenticate(self.student)
+        response_sizes = []
+
+        def request():
+            response = self.client.get('/courses/list_enrollments/')
+            response_sizes.append(len(response.data['results']))
+
+        assert_queries_do_not_scale(self, self.uncached(enroll), request, sizes=(1, 5, 10))
+        self.assertEqual(response_sizes, [1, 5, 10])
+
+    def test_popular_courses(self):
+        def rank(size):
+            for course in self.create_courses(size):
+                CoursePopularity.objects.filter(course=course, window='all').update(enrollment_count=3)
+
+        assert_queries_do_not_scale(self, self.uncached(rank), lambda: self.client.get('/courses/popular-courses/'),
+                                    sizes=(1, 5, 10))
+
+
+class PopularityExpiryTests(TestCase):
+    """
+        Checks that the periodic refresh subtracts exactly the enrollments that aged out of
+        the time-bounded windows, matching a full rebuild.
+    """
+    def setUp(self):
+        instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        self.course = Course.objects.create(
+            title='Popular', description='Description', instructor=instructor, price=Decimal('10.00')
+        )
+        self.now = timezone.now()
+        for index, age in enumerate((1, 5, 20)):
+            student = CustomUser.objects.create_user(
+                username=f'student{index}', email=f'student{index}@example.com', password='password'
+            )
+            enrollment = Enrollment.objects.create(user=student, course=self.course)
+            Enrollment.objects.filter(pk=enrollment.pk).update(enrolled_at=self.now - timedelta(days=age))
+
+    def counts(self):
+        return dict(CoursePopularity.objects.filter(course=self.course).values_list('window', 'enrollment_count'))
+
+    def expire_at(self, now):
+        with mock.patch('courses.services.popularity.timezone') as clock:
+            clock.now.return_value = now
+            return expire_popularity()
+
+    def test_expiry_matches_full_rebuild(self):
+        refresh_popularity(['all', '7d', '30d'])
+        self.assertEqual(self.counts(), {'all': 3, '7d': 2, '30d': 3})
+
+        # Three days later the 5-day-old enrollment left the 7-day window.
+        later = self.now + timedelta(days=3)
+        self.assertEqual(self.expire_at(later), {'7d': 1, '30d': 0})
+        self.assertEqual(self.counts(), {'all': 3, '7d': 1, '30d': 3})
+
+        # Running again reads nothing new.
+        self.assertEqual(self.expire_at(later), {'7d': 0, '30d': 0})
+        self.assertEqual(self.counts(), {'all': 3, '7d': 1, '30d': 3})
+
+    def test_first_expiry_rebuilds_the_window(self):
+        self.expire_at(self.now)
+
+        self.assertEqual(self.counts(), {'all': 0, '7d': 2, '30d': 3})
+
+
+class CourseSearchTests(TestCase):
+    """
+        Checks that saving a course refreshes its search document and that it is found by
+        title, tag and instructor.
+    """
+    def test_saved_course_is_searchable(self):
+        instructor = CustomUser.objects.create_user(
+            username='ada', email='ada@example.com', password='password', role='instructor'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(
+                title='Concurrency patterns', description='Locks and queues', instructor=instructor,
+                price=Decimal('10.00'),
+            )
+            course.tags.add(Tag.objects.create(name='postgres'))
+
+        for query in ('concurrency', 'postgres', 'ada'):
+            response = self.client.get('/courses/search/', {'q': query})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([result['id'] for result in response.data['results']], [course.id], query)
+
+    def test_highlights_escape_course_text(self):
+        instructor = CustomUser.objects.create_user(
+            username='mallory', email='mallory@example.com', password='password', role='instructor'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(
+                title='<img src=x onerror=alert(1)> Concurrency', description='<script>x()</script> concurrency',
+                instructor=instructor, price=Decimal('10.00'),
+            )
+
+        result = self.client.get('/courses/search/', {'q': 'concurrency'}).data['results'][0]
+
+        self.assertEqual(result['title_highlight'], '&lt;img src=x onerror=alert(1)&gt; <mark>Concurrency</mark>')
+        self.assertNotIn('<script>', result['snippet'])
+        self.assertIn('<mark>concurrency</mark>', result['snippet'])
+
+
+class CachedComputationTests(TestCase):
+    """
+        Checks that the background computations replay their views on anonymous requests
+        rebuilt from the stored request description.
+    """
+    def setUp(self):
+        clear_caches()
+        instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        self.course = Course.objects.create(
+            title='Replayed', description='Description', instructor=instructor, price=Decimal('10.00')
+        )
+
+    def params(self, path, query='', **extra):
+        return {'path': path, 'query': query, 'host': 'testserver', 'secure': True, **extra}
+
+    def test_course_list_is_replayed_with_its_query(self):
+        expensive = Course.objects.create(
+            title='Expensive', description='Description', instructor=self.course.instructor, price=Decimal('99.00')
+        )
+
+        data = course_list(self.params('/courses/', 'ordering=-price'))
+
+        self.assertEqual([course['id'] for course in data['results']], [expensive.id, self.course.id])
+
+    def test_enrollments_of_deleted_user_are_empty(self):
+        student = CustomUser.objects.create_user(username='student', email='student@example.com', password='password')
+        Enrollment.objects.create(user=student, course=self.course)
+        params = self.params('/courses/list_enrollments/', user_id=student.id)
+        self.assertEqual([row['course_id'] for row in user_enrollment_rows(params)['results']], [self.course.id])
+
+        student.delete()
+
+        self.assertEqual(user_enrollment_rows(params)['results'], [])
+
+
+class EnrollmentVersionTests(TestCase):
+    """
+        Checks that enrollment and course versions are atomic counters that outlive the
+        entries cached under them and never go back after expiring.
+    """
+    def setUp(self):
+        clear_caches()
+
+    def test_versions_are_incremented(self):
+        invalidate_user_enrollments([1])
+        bump_course_versions([1])
+        user_version, course_version = get_user_enrollments_version(1), get_course_versions([1])[1]
+
+        invalidate_user_enrollments([1])
+        bump_course_versions([1])
+
+        self.assertEqual(get_user_enrollments_version(1), user_version + 1)
+        self.assertEqual(get_course_versions([1])[1], course_version + 1)
+
+    def test_expired_version_restarts_above_previous(self):
+        invalidate_user_enrollments([1])
+        previous = get_user_enrollments_version(1)
+
+        enrollments_cache().delete('user_version:1')
+        invalidate_user_enrollments([1])
+
+        self.assertGreater(get_user_enrollments_version(1), previous)
+
+    def test_versions_outlive_stale_pages(self):
+        self.assertGreater(ENROLLMENT_VERSION_TIMEOUT, 2 * enrollments_cache().default_timeout)
+
+
+@override_settings(CACHE_BACKEND='redis')
+class TieredCacheListenerTests(SimpleTestCase):
+    """
+        Checks that a dropped invalidation subscription is started again instead of leaving
+        the process without invalidations until it restarts.
+    """
+    def test_listener_resubscribes_after_connection_error(self):
+        tier = TieredCache('catalog', channel='test:invalidate')
+        client = mock.Mock()
+        with mock.patch('edunexus.tiered_cache.redis.Redis.from_url', return_value=client) as from_url, \
+                mock.patch.object(tier.shared, 'get', return_value=None):
+            tier.get('key')
+            pubsub = client.pubsub.return_value
+            handler = pubsub.run_in_thread.call_args.kwargs['exception_handler']
+            timeout = settings.REDIS_CACHE_OPTIONS['socket_timeout']
+            self.assertEqual(from_url.call_args.kwargs['socket_timeout'], timeout)
+
+            tier.local.set('key', 'stale')
+            thread = mock.Mock()
+            handler(redis.ConnectionError(), pubsub, thread)
+
+            thread.stop.assert_called_once()
+            self.assertIsNone(tier.local.get('key'))
+            tier.get('key')
+            self.assertEqual(pubsub.run_in_thread.call_count, 2)
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedSimpleRouter
 
 from reviews.views import ReviewViewSet
-from .views import CourseViewSet, LessonViewSet, PopularCoursesView
+from .views import CourseViewSet, LessonViewSet, PopularCoursesView, CourseCacheStatsView
 
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet, basename='course')
@@ -14,6 +14,7 @@ courses_router.register(r'reviews', ReviewViewSet, basename='review')
 
 urlpatterns = [
     path('courses/popular-courses/', PopularCoursesView.as_view(), name='popular-courses'),
+    path('courses/cache-stats/', CourseCacheStatsView.as_view(), name='course-cache-stats'),
     path('', include(router.urls)),
     path('', include(courses_router.urls)),
 ]
@@ -1,43 +1,86 @@
-from django.db.models import Count
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
-from django.core.cache import cache
-
-from .models import Course, Enrollment, Lesson
+from .cache import (
+    CATALOG_CACHE_CONTROL, catalog_cache_key, catalog_tier, course_list_cache_key, get_cache_stats,
+    get_catalog_validators,
+)
+from .models import Course, CoursePopularity, Enrollment, Lesson
 from .permissions import IsInstructor, IsCourseOwner
-from .serializers import CourseSerializer, EnrollmentSerializer, LessonSerializer, PopularCourseSerializer
+from .serializers import (
+    CourseSerializer, CourseSearchResultSerializer, EnrollmentSerializer, LessonSerializer, PopularCourseSerializer
+)
 from .filters import CourseFilter
+from .pagination import EnrollmentCursorPagination
+from .streaming import stream_ndjson, wants_ndjson_stream
+from .services.popularity import POPULARITY_WINDOWS
+from .services.enrollment_cache import get_enrollment_page
+from .services.search import search_courses
+from edunexus.cached_compute import describe_request
+from edunexus.conditional import ConditionalGetMixin
 
-class CourseViewSet(ModelViewSet):
+class CourseViewSet(ConditionalGetMixin, ModelViewSet):
     """
         ViewSet for managing courses.
 
         Features:
             - Handles CRUD operations for courses.
             - Includes filtering, enrolling users, and listing course enrollments.
+            - `list` and `retrieve` carry an ETag derived from the catalog generation, so
+              conditional requests for an unchanged catalog get a 304 without any query.
+              The generation is read from Redis on every request (never from L1), so ETags
+              and cached pages change as soon as a catalog write commits, in every process.
 
         Methods:
             - `get_permissions`: Determines permissions dynamically for different actions.
-            - `list_enrollments`: Lists enrollments of users in a course.
+            - `get_queryset`: Loads the relations declared by `CourseSerializer` up front.
+            - `list_enrollments`: Lists the user's enrollments with cursor pagination,
+               or streams them all as NDJSON with `?stream=ndjson`. Pages are cached as
+               enrollment rows plus per-course payloads (see `services.enrollment_cache`).
             - `retrieve_enrollment`: Retrieves details of a specific enrollment.
-            - `list`: Lists available courses with optional filters.
+            - `search`: Ranked full-text search over titles, tags, instructors, descriptions
+               and lesson content, combinable with the regular course filters.
+            - `list`: Lists available courses with optional filters, cached per normalized
+               filter/page parameters and invalidated whenever the catalog changes.
+            - `retrieve`: Retrieves a course, cached like `list`. Both are served from the
+               two-tier catalog cache (in-process L1 in front of Redis).
+            - Cached responses are computed once per expiry across all workers, and expired
+              ones are served while a Celery task recomputes them (see `courses.computations`).
+            - `get_validators`: Returns the catalog version and last write time.
+            - `get_list_cache_params`: Query parameters that affect the list response.
 
         Attributes:
             - `queryset`: Default queryset for courses.
             - `serializer_class`: Serializer class associated with courses.
             - `filter_backends`: Backends to handle filtering mechanics.
             - `filterset_class`: Filter set class for course filtering.
+            - `use_cache`: Set to `False` (with `as_view(..., use_cache=False)`) to bypass
+               the response caches, as background recomputations do.
+            - `cache_control`: HTTP caching policy per action.
     """
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = CourseFilter
+    use_cache = True
+    cache_control = {
+        'list': CATALOG_CACHE_CONTROL,
+        'retrieve': CATALOG_CACHE_CONTROL,
+        'list_enrollments': 'private, no-cache',
+        'retrieve_enrollment': 'private, no-cache',
+    }
+
+    def get_validators(self):
+        return get_catalog_validators()
+
+    def get_queryset(self):
+        return CourseSerializer.setup_eager_loading(super().get_queryset())
 
     def get_permissions(self):
         if self.action in ['create']:
@@ -53,43 +96,76 @@ class CourseViewSet(ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def list_enrollments(self, request):
         user = request.user
-        cache_key = f"user_enrollments_{user.id}"
-        cached_data = cache.get(cache_key)
+        paginator = EnrollmentCursorPagination()
+        enrollments = EnrollmentSerializer.setup_eager_loading(Enrollment.objects.filter(user=user))
 
-        if cached_data is not None:
-            return Response(cached_data)
+        if wants_ndjson_stream(request):
+            return stream_ndjson(enrollments.order_by(*paginator.ordering), EnrollmentSerializer)
 
-        enrollments = Enrollment.objects.filter(user=user)
-        serializer = EnrollmentSerializer(enrollments, many=True)
-        cache.set(cache_key, serializer.data, timeout=60*15)
-        return Response(serializer.data)
+        return Response(get_enrollment_page(request, user.id))
 
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def retrieve_enrollment(self, request, pk=None):
-        enrollment = Enrollment.objects.filter(user=request.user, course__pk=pk).first()
+        enrollments = Enrollment.objects.filter(user=request.user, course__pk=pk)
+        enrollment = EnrollmentSerializer.setup_eager_loading(enrollments).first()
         if not enrollment:
             return Response({'detail': 'Enrollment not found.'}, status=status.HTTP_404_NOT_FOUND)
 
         serializer = EnrollmentSerializer(enrollment)
         return Response(serializer.data)
 
+    def get_list_cache_params(self):
+        params = set(self.filterset_class.base_filters)
+        if self.paginator is not None:
+            params.add(self.paginator.page_query_param)
+            if getattr(self.paginator, 'page_size_query_param', None):
+                params.add(self.paginator.page_size_query_param)
+        return params
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': "This query parameter is required."})
+
+        results = search_courses(self.filter_queryset(self.get_queryset()), text)
+        page = self.paginate_queryset(results)
+        serializer = CourseSearchResultSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
     def list(self, request, *args, **kwargs):
-        cached_courses = cache.get('course_list')
-        if cached_courses is not None:
-            return Response(cached_courses)
+        if not self.use_cache:
+            return super().list(request, *args, **kwargs)
+
+        cache_key = course_list_cache_key(request.query_params, self.get_list_cache_params())
+        list_courses = super().list
+        return Response(catalog_tier.get_or_compute(
+            cache_key, 'courses.list', describe_request(request), lambda: list_courses(request, *args, **kwargs).data
+        ))
 
-        response = super().list(request, *args, **kwargs)
-        cache.set('course_list', response.data, timeout=60*15)
-        return response
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_cache:
+            return super().retrieve(request, *args, **kwargs)
 
+        cache_key = catalog_cache_key(f"course_detail:{kwargs['pk']}")
+        retrieve_course = super().retrieve
+        return Response(catalog_tier.get_or_compute(
+            cache_key,
+            'courses.detail',
+            describe_request(request, pk=kwargs['pk']),
+            lambda: retrieve_course(request, *args, **kwargs).data,
+        ))
 
-class LessonViewSet(ModelViewSet):
+
+class LessonViewSet(ConditionalGetMixin, ModelViewSet):
     """
         ViewSet for managing lessons within courses.
 
         Features:
             - Handles CRUD operations for lessons.
             - Supports file uploads for lessons (e.g., video files).
+            - `list` and `retrieve` carry an ETag built from the lesson count and latest
+              `updated_at` of the course, answering conditional requests with a 304.
 
         Methods:
             - `get_permissions`: Determines permissions dynamically for different actions.
@@ -99,9 +175,15 @@ class LessonViewSet(ModelViewSet):
         Attributes:
             - `serializer_class`: Serializer class associated with lessons.
             - `parser_classes`: Parsers supported for request data handling.
+            - `cache_control`: Lessons are only shown to signed-in users, so they are cached
+               privately and revalidated on every use.
     """
     serializer_class = LessonSerializer
     parser_classes = [MultiPartParser, FormParser]
+    cache_control = {
+        'list': 'private, no-cache',
+        'retrieve': 'private, no-cache',
+    }
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -119,25 +201,82 @@ class LessonViewSet(ModelViewSet):
         serializer.save(course_id=course_id)
 
 
+POPULAR_CACHE_PARAMS = ('window', 'category', 'page')
+POPULAR_CACHE_TIMEOUT = 60
+
+
 class PopularCoursesView(GenericAPIView):
     """
         View for retrieving a list of popular courses.
 
         Features:
             - Lists courses sorted by popularity (e.g., enrollment count).
+            - Reads the precomputed `CoursePopularity` ranking, so each page is a top-K index scan.
+            - Supports `window` (`all`, `7d`, `30d`; default `all`) and `category` (ID) query parameters.
+            - Paginated with the default pagination class.
+            - Pages are cached in the two-tier catalog cache for `POPULAR_CACHE_TIMEOUT` seconds,
+              since rankings change with every enrollment rather than with catalog writes.
 
         Methods:
-            - `get`: Returns a query set of popular courses sorted by specified criteria.
+            - `get_queryset`: Returns the ranking rows for the requested window and category.
+            - `get`: Returns a page of popular courses with their enrollment counts, through the cache.
+            - `get_page`: Builds the response data of a page.
 
         Attributes:
             - `permission_classes`: Permissions applied to accessing this view.
+            - `use_cache`: Set to `False` to bypass the cache, as background recomputations do.
     """
     permission_classes = [AllowAny]
+    serializer_class = PopularCourseSerializer
+    use_cache = True
+
+    def get_queryset(self):
+        window = self.request.query_params.get('window', 'all')
+        if window not in POPULARITY_WINDOWS:
+            raise ValidationError({'window': f"Choose one of: {', '.join(POPULARITY_WINDOWS)}."})
+
+        rankings = CoursePopularity.objects.filter(window=window)
+        category = self.request.query_params.get('category')
+        if category:
+            if not category.isdigit():
+                raise ValidationError({'category': "Category must be a numeric ID."})
+            rankings = rankings.filter(category_id=category)
+
+        rankings = PopularCourseSerializer.setup_eager_loading(rankings.select_related('course'), prefix='course__')
+        return rankings.order_by('-enrollment_count', 'course_id')
 
     def get(self, request):
-        popular_courses = Course.objects.annotate(
-            enrollment_count=Count('enrollments')
-        ).order_by('-enrollment_count')
+        if not self.use_cache:
+            return Response(self.get_page())
+
+        cache_key = catalog_cache_key('popular_courses', request.query_params, POPULAR_CACHE_PARAMS)
+        return Response(catalog_tier.get_or_compute(
+            cache_key, 'courses.popular', describe_request(request), self.get_page, timeout=POPULAR_CACHE_TIMEOUT
+        ))
+
+    def get_page(self):
+        rankings = self.paginate_queryset(self.get_queryset())
+        courses = []
+        for ranking in rankings:
+            ranking.course.enrollment_count = ranking.enrollment_count
+            courses.append(ranking.course)
+
+        serializer = self.get_serializer(courses, many=True)
+        return self.get_paginated_response(serializer.data).data
+
+
+class CourseCacheStatsView(GenericAPIView):
+    """
+        View exposing the course catalog cache counters for monitoring dashboards.
+
+        Features:
+            - Returns L1 hit, L2 hit, miss and invalidation counters, the current catalog
+              generation and the L1 size of the answering process.
 
-        serializer = PopularCourseSerializer(popular_courses, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        Attributes:
+            - `permission_classes`: Restricted to admin users.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_cache_stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,29 @@
+import zlib
+
+from django.core.cache.backends.redis import RedisSerializer
+
+COMPRESSED_PREFIX = b'z'
+
+
+class CompressedPickleSerializer(RedisSerializer):
+    """
+        Pickle serializer for the Redis cache that compresses large payloads with zlib.
+
+        Integers are stored as plain numbers (so `incr`/`decr` keep working in Redis),
+        values smaller than `min_compress_size` bytes are stored as plain pickles, and
+        larger ones, such as cached catalog pages, are compressed behind a one-byte marker.
+        Pickles start with `\\x80`, so the marker never collides with uncompressed data.
+    """
+    min_compress_size = 1024
+    compress_level = 6
+
+    def dumps(self, obj):
+        data = super().dumps(obj)
+        if isinstance(data, int) or len(data) < self.min_compress_size:
+            return data
+        return COMPRESSED_PREFIX + zlib.compress(data, self.compress_level)
+
+    def loads(self, data):
+        if data[:1] == COMPRESSED_PREFIX:
+            data = zlib.decompress(data[1:])
+        return super().loads(data)
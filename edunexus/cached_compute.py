@@ -0,0 +1,179 @@
+import math
+import random
+import time
+from io import BytesIO
+
+from celery import shared_task
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIRequest
+
+COMPUTATIONS = {}
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+XFETCH_BETA = 1.0
+
+
+def register(name):
+    """
+    Register a named computation, so a Celery worker can recompute a cached value.
+
+    The decorated function is called with the `params` dict given to `fetch` and must
+    return the value to cache.
+    """
+    def decorator(func):
+        COMPUTATIONS[name] = func
+        return func
+    return decorator
+
+
+def _store(cache, key, value, delta, ttl, stale_ttl):
+    envelope = {'value': value, 'expires_at': time.time() + ttl, 'delta': delta}
+    cache.set(key, envelope, timeout=ttl + stale_ttl)
+
+
+def _compute_and_store(cache, key, compute, ttl, stale_ttl):
+    started = time.monotonic()
+    value = compute()
+    _store(cache, key, value, time.monotonic() - started, ttl, stale_ttl)
+    return value
+
+
+def _schedule_revalidation(alias, key, name, params, ttl, stale_ttl):
+    # One revalidation per key at a time; the guard expires if the worker never runs it.
+    if not caches[alias].add(f'{key}:revalidating', 1, timeout=LOCK_TIMEOUT):
+        return
+    try:
+        revalidate.delay(alias, key, name, params, ttl, stale_ttl)
+    except Exception:
+        # Broker unavailable: keep serving stale data; the next read retries.
+        caches[alias].delete(f'{key}:revalidating')
+
+
+def fetch(alias, key, name, params, compute, ttl=None, stale_ttl=None, beta=XFETCH_BETA):
+    """
+    Read a cached value, computing it at most once across all processes.
+
+    Values are stored in an envelope with a soft expiry (`ttl`) and are kept `stale_ttl`
+    seconds longer:
+
+    - A fresh value is served as is, but may be revalidated early with probability
+      growing as expiry approaches and with the cost of the last computation (XFetch),
+      so hot keys are refreshed before they expire.
+    - A stale value is served immediately while a Celery task recomputes it
+      (stale-while-revalidate) through the computation registered under `name`.
+    - On a miss, one caller takes a lock in the cache and computes; the others wait for
+      its result instead of recomputing (single-flight), up to `LOCK_TIMEOUT` seconds.
+
+    Args:
+        alias (str): The cache alias to store the value in.
+        key (str): The cache key.
+        name (str): The registered computation used to revalidate in the background.
+        params (dict): JSON-serializable arguments of the registered computation.
+        compute (callable): Computes the value in the current process on a miss.
+        ttl (int, optional): Soft TTL in seconds (default is the alias TTL).
+        stale_ttl (int, optional): How long a stale value may be served (default is `ttl`).
+        beta (float): XFetch aggressiveness; higher values revalidate earlier.
+
+    Returns:
+        tuple: The value and how it was found (`hit`, `stale` or `miss`).
+    """
+    cache = caches[alias]
+    ttl = cache.default_timeout if ttl is None else ttl
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+
+    envelope = cache.get(key)
+    if envelope is not None:
+        now = time.time()
+        if now >= envelope['expires_at']:
+            _schedule_revalidation(alias, key, name, params, ttl, stale_ttl)
+            return envelope['value'], 'stale'
+        if now - envelope['delta'] * beta * math.log(random.random() or 1e-12) >= envelope['expires_at']:
+            _schedule_revalidation(alias, key, name, params, ttl, stale_ttl)
+        return envelope['value'], 'hit'
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            return _compute_and_store(cache, key, compute, ttl, stale_ttl), 'miss'
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        envelope = cache.get(key)
+        if envelope is not None:
+            return envelope['value'], 'hit'
+        if cache.get(lock_key) is None:
+            break
+    # The lock holder failed or is too slow: compute here rather than fail the request.
+    return _compute_and_store(cache, key, compute, ttl, stale_ttl), 'miss'
+
+
+def cached_compute(alias, key, name, params, compute, **options):
+    """
+    Return the value of `fetch`, see its arguments.
+    """
+    return fetch(alias, key, name, params, compute, **options)[0]
+
+
+@shared_task
+def revalidate(alias, key, name, params, ttl, stale_ttl):
+    """
+    Task to recompute a cached value through its registered computation.
+
+    Returns:
+        str: Status message indicating the recomputed key.
+    """
+    cache = caches[alias]
+    try:
+        _compute_and_store(cache, key, lambda: COMPUTATIONS[name](params), ttl, stale_ttl)
+    finally:
+        cache.delete(f'{key}:revalidating')
+    return f"Revalidated {key}."
+
+
+def describe_request(request, **extra):
+    """
+    Describe a GET request with JSON-serializable data, so `rebuild_request` can rebuild it.
+    """
+    return {
+        'path': request.path,
+        'query': request.META.get('QUERY_STRING', ''),
+        'host': request.get_host(),
+        'secure': request.is_secure(),
+        **extra,
+    }
+
+
+def rebuild_request(params):
+    """
+    Rebuild an anonymous GET request from `describe_request` data.
+
+    Only public views can be replayed this way; computations of per-user data read the
+    user from their own `params` (e.g. `user_id`) instead of authenticating the request.
+    """
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        # WSGI carries the UTF-8 bytes of the path as a latin-1 string.
+        'PATH_INFO': params['path'].encode().decode('iso-8859-1'),
+        'QUERY_STRING': params['query'],
+        'HTTP_HOST': params['host'],
+        'SERVER_NAME': params['host'].split(':')[0],
+        'SERVER_PORT': '443' if params['secure'] else '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.url_scheme': 'https' if params['secure'] else 'http',
+        'wsgi.input': BytesIO(),
+    }
+    return WSGIRequest(environ)
+
+
+def replay_view(view, params, **kwargs):
+    """
+    Run `view` on a request rebuilt from `describe_request` data and return the response data.
+    """
+    response = view(rebuild_request(params), **kwargs)
+    if response.status_code != 200:
+        raise ValueError(f"Replaying {params['path']} returned status {response.status_code}.")
+    return response.data
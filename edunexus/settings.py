@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from decimal import Decimal
 
 load_dotenv()
 
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'debug_toolbar',
     'drf_yasg',
@@ -180,22 +182,97 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=6),
 }
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+# Cache namespaces and their default TTL in seconds. Every namespace is a cache alias with its
+# own key prefix, so `caches['catalog']` never sees keys of `caches['auth_codes']`.
+CACHE_NAMESPACES = {
+    'default': 60 * 5,
+    'catalog': 60 * 15,
+    'enrollments': 60 * 15,
+    'auth_codes': 60 * 10,
+    'rate_limits': 60 * 2,
+}
+
+# CACHE_BACKEND is `redis` (shared by every worker), `fakeredis` (in-process Redis server, for tests;
+# requires the fakeredis package) or `locmem` (per-process, for local development).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'redis')
+REDIS_CACHE_URL = os.getenv('REDIS_CACHE_URL', 'redis://127.0.0.1:6379/1')
+REDIS_CACHE_OPTIONS = {
+    'serializer': 'edunexus.cache_serializers.CompressedPickleSerializer',
+    'max_connections': int(os.getenv('REDIS_CACHE_MAX_CONNECTIONS', 50)),
+    'socket_connect_timeout': 1,
+    'socket_timeout': 1,
+    'retry_on_timeout': True,
+    'health_check_interval': 30,
 }
+if CACHE_BACKEND == 'fakeredis':
+    import fakeredis
 
+    REDIS_CACHE_OPTIONS.update(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer())
 
+# In-process L1 in front of the shared catalog cache: entry limit and TTL in seconds.
+CATALOG_L1_CACHE = {
+    'MAX_ENTRIES': 1000,
+    'TIMEOUT': 30,
+}
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+CACHES = {}
+for _namespace, _timeout in CACHE_NAMESPACES.items():
+    if CACHE_BACKEND == 'locmem':
+        CACHES[_namespace] = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': _namespace,
+            'TIMEOUT': _timeout,
+        }
+    else:
+        CACHES[_namespace] = {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': _namespace,
+            'TIMEOUT': _timeout,
+            'OPTIONS': REDIS_CACHE_OPTIONS,
+        }
+
+
+
+# Set EMAIL_BACKEND=django.core.mail.backends.locmem.EmailBackend, or point EMAIL_HOST/EMAIL_PORT at a
+# local SMTP stand-in (with EMAIL_USE_TLS=False), to exercise the mail queue without sending real mail.
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_USE_SSL = False
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 
+# Mail queue: emails sent per batch (over one connection), per minute across all workers,
+# attempts before a message is marked failed, and how long sent messages are kept.
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_RATE_LIMIT = 300
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETENTION = timedelta(days=7)
+
+
+# How long processed order outbox events are kept for auditing.
+ORDER_OUTBOX_RETENTION = timedelta(days=7)
+# How long after purchase a buyer may refund a completed order themselves; later refunds
+# go through the order admin.
+ORDER_REFUND_WINDOW = timedelta(days=14)
+
+# Pricing: tax table implementation and tax percentage per region code.
+PRICING_TAX_TABLE = 'orders.services.pricing.SettingsTaxTable'
+PRICING_TAX_RATES = {
+    'default': Decimal('5'),
+}
+
+# How long a response stored for an `Idempotency-Key` header is replayed.
+IDEMPOTENCY_KEY_WINDOW = timedelta(hours=24)
+# How long a request may hold an `Idempotency-Key` without completing. Past it, the worker is
+# assumed dead and a retry takes the key over. Keep it above the longest request timeout.
+IDEMPOTENCY_KEY_LEASE = timedelta(minutes=2)
+
+# Text search configuration used for the course search index.
+COURSE_SEARCH_CONFIG = 'english'
+
 
 CELERY_BROKER_URL = 'redis://127.0.0.1:6379'
 CELERY_ACCEPT_CONTENT = ['application/json']
@@ -203,4 +280,39 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
-CELERY_RESULT_BACKEND = 'django-db'
\ No newline at end of file
+CELERY_RESULT_BACKEND = 'django-db'
+
+CELERY_BEAT_SCHEDULE = {
+    'refresh-course-popularity': {
+        'task': 'courses.tasks.refresh_course_popularity',
+        'schedule': timedelta(minutes=10),
+    },
+    'checkpoint-account-balances': {
+        'task': 'users.tasks.checkpoint_account_balances',
+        'schedule': timedelta(hours=1),
+    },
+    'reconcile-account-balances': {
+        'task': 'users.tasks.reconcile_account_balances',
+        'schedule': timedelta(days=1),
+    },
+    'drain-email-queue': {
+        'task': 'users.tasks.drain_email_queue',
+        'schedule': timedelta(minutes=1),
+    },
+    'purge-sent-emails': {
+        'task': 'users.tasks.purge_sent_emails',
+        'schedule': timedelta(hours=1),
+    },
+    'drain-order-outbox': {
+        'task': 'orders.tasks.drain_order_outbox',
+        'schedule': timedelta(minutes=1),
+    },
+    'purge-processed-outbox-events': {
+        'task': 'orders.tasks.purge_processed_outbox_events',
+        'schedule': timedelta(hours=1),
+    },
+    'purge-expired-idempotency-keys': {
+        'task': 'orders.tasks.purge_expired_idempotency_keys',
+        'schedule': timedelta(hours=1),
+    },
+}
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def assert_queries_do_not_scale(testcase, grow, request, sizes=(1, 5, 25)):
+    """
+    Fail the test when the number of queries issued by `request` grows with the result size.
+
+    Args:
+        testcase (TestCase): The running test case, used to report the failure.
+        grow (callable): Called with each size; must create data so the next request returns that many rows.
+        request (callable): Performs the request under test, e.g. `lambda: self.client.get(url)`.
+        sizes (tuple, optional): Result sizes to compare (default is 1, 5 and 25).
+
+    Returns:
+        int: The constant number of queries issued per request.
+    """
+    counts = {}
+    for size in sizes:
+        grow(size)
+        with CaptureQueriesContext(connection) as context:
+            request()
+        counts[size] = len(context.captured_queries)
+
+    if len(set(counts.values())) > 1:
+        report = ", ".join(f"{size} rows: {count} queries" for size, count in counts.items())
+        testcase.fail(f"Query count grows with result size ({report}).")
+    return counts[sizes[0]]
+
+
+def clear_caches():
+    """
+    Empty every cache namespace, e.g. in `setUp`, so cached pages, codes and counters
+    do not leak between tests. Run the tests with `CACHE_BACKEND=fakeredis` (or `locmem`)
+    to avoid touching a real Redis server.
+
+    Redis namespaces share one database, so each is emptied by deleting the keys under its
+    `KEY_PREFIX`: `RedisCache.clear()` runs `FLUSHDB`, which would also drop anything else
+    stored in that database.
+    """
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if isinstance(cache, RedisCache) and cache.key_prefix:
+            client = cache._cache.get_client(write=True)
+            keys = list(client.scan_iter(match=f'{cache.key_prefix}:*'))
+            if keys:
+                client.delete(*keys)
+        else:
+            cache.clear()
@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+from django.core.cache import caches
+
+from edunexus.cached_compute import fetch
+
+METRICS_FLUSH_INTERVAL = 10
+REDIS_TIMEOUT_OPTIONS = ('socket_connect_timeout', 'socket_timeout', 'health_check_interval')
+TIERS = ('l1_hits', 'l2_hits', 'misses')
+_MISSING = object()
+
+
+class LRUCache:
+    """
+        Thread-safe, size-bounded in-process cache with per-entry expiry.
+
+        Holds at most `max_entries` values; adding one more evicts the least recently
+        used entry. Expired entries are dropped when they are read.
+    """
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """
+        Two-tier cache: a bounded in-process LRU (L1) in front of a shared cache alias (L2).
+
+        Initialization Args:
+            - `alias`: The shared cache alias used as L2 (e.g. `catalog`).
+            - `channel`: Redis pub/sub channel broadcasting invalidations to every process.
+            - `max_entries`, `timeout`: Size bound and TTL of L1.
+
+        Features:
+            - Most hits are served from L1 without a network round-trip. L1 entries never
+              outlive `timeout`, which bounds staleness if an invalidation is missed.
+            - `invalidate` clears L1 in every process through the pub/sub channel (only when
+              `settings.CACHE_BACKEND` is `redis`; otherwise the L1 TTL alone applies).
+            - `get_or_compute` lets one thread per key and process read L2 at a time, and
+              L2 computations are single-flight across processes (see `cached_compute.fetch`).
+            - Counts L1 hits, L2 hits and misses per process and adds them to shared
+              counters in L2 every `METRICS_FLUSH_INTERVAL` seconds.
+
+        Methods:
+            - `get`, `set`: Read through / write through both tiers.
+            - `get_or_compute`: Returns the cached value or computes and stores it.
+            - `invalidate`: Clears L1 everywhere.
+            - `stats`: Returns the shared per-tier counters and the local L1 size.
+    """
+    def __init__(self, alias, channel=None, max_entries=1000, timeout=30):
+        self.alias = alias
+        self.channel = channel
+        self.local = LRUCache(max_entries, timeout)
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+        self._metrics = dict.fromkeys(TIERS, 0)
+        self._metrics_lock = threading.Lock()
+        self._metrics_flushed_at = time.monotonic()
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        self._client = None
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def _uses_pubsub(self):
+        return bool(self.channel) and settings.CACHE_BACKEND == 'redis'
+
+    def _redis(self):
+        if self._client is None:
+            # Same timeouts as the cache connections, so an unreachable server fails fast.
+            options = {name: settings.REDIS_CACHE_OPTIONS[name]
+                       for name in REDIS_TIMEOUT_OPTIONS if name in settings.REDIS_CACHE_OPTIONS}
+            self._client = redis.Redis.from_url(settings.REDIS_CACHE_URL, **options)
+        return self._client
+
+    def _on_listener_error(self, error, pubsub, thread):
+        # The subscription is lost: stop the thread and subscribe again on the next read.
+        # Entries cached meanwhile may miss an invalidation, so L1 is dropped as well.
+        thread.stop()
+        self._listener_pid = None
+        self.local.clear()
+
+    def _ensure_listener(self):
+        """
+        Subscribe this process to the invalidation channel, once per process (after a fork
+        the subscriber thread of the parent is gone, so it is started again). If the
+        subscription drops, e.g. when Redis restarts, the next read subscribes again.
+        """
+        if not self._uses_pubsub() or self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._client = None
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: lambda message: self.local.clear()})
+                pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._on_listener_error)
+            except redis.RedisError:
+                return
+            # Entries cached before subscribing may have missed an invalidation.
+            self.local.clear()
+            self._listener_pid = os.getpid()
+
+    def _record(self, tier):
+        with self._metrics_lock:
+            self._metrics[tier] += 1
+            if time.monotonic() - self._metrics_flushed_at < METRICS_FLUSH_INTERVAL:
+                return
+            pending, self._metrics = self._metrics, dict.fromkeys(TIERS, 0)
+            self._metrics_flushed_at = time.monotonic()
+        for name, count in pending.items():
+            if count:
+                key = f'tiered:stats:{name}'
+                self.shared.add(key, 0, timeout=None)
+                try:
+                    self.shared.incr(key, count)
+                except ValueError:
+                    # The counter was evicted between `add` and `incr`.
+                    self.shared.set(key, count, timeout=None)
+
+    def get(self, key, default=None):
+        self._ensure_listener()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self._record('l1_hits')
+            return value
+
+        value = self.shared.get(key, _MISSING)
+        if value is not _MISSING:
+            self._record('l2_hits')
+            self.local.set(key, value)
+            return value
+
+        self._record('misses')
+        return default
+
+    def set(self, key, value, timeout=None):
+        if timeout is None:
+            self.shared.set(key, value)
+        else:
+            self.shared.set(key, value, timeout=timeout)
+        self.local.set(key, value, timeout)
+
+    def get_or_compute(self, key, name, params, compute, timeout=None):
+        """
+        Return the value cached under `key`, computing and caching it on a miss.
+
+        L2 is read through `edunexus.cached_compute.fetch`, so across processes the value
+        is computed once per expiry, refreshed early while it is hot and served stale
+        while a Celery task recomputes it.
+
+        Args:
+            key (str): The cache key.
+            name (str): The registered computation that recomputes the value in the background.
+            params (dict): JSON-serializable arguments of that computation.
+            compute (callable): Called without arguments to produce the value in this process.
+            timeout (int, optional): L2 TTL (default is the alias TTL); L1 keeps its own bound.
+
+        Returns:
+            The cached or computed value.
+        """
+        self._ensure_listener()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self._record('l1_hits')
+            return value
+
+        with self._key_locks_guard:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                # Another thread may have fetched the value while this one waited.
+                value = self.local.get(key, _MISSING)
+                if value is _MISSING:
+                    value, found = fetch(self.alias, key, name, params, compute, ttl=timeout)
+                    self._record('misses' if found == 'miss' else 'l2_hits')
+                    self.local.set(key, value, timeout)
+                else:
+                    self._record('l1_hits')
+                return value
+            finally:
+                with self._key_locks_guard:
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+
+    def invalidate(self):
+        self.local.clear()
+        if self._uses_pubsub():
+            try:
+                self._redis().publish(self.channel, 'clear')
+            except redis.RedisError:
+                pass
+
+    def stats(self):
+        values = self.shared.get_many([f'tiered:stats:{name}' for name in TIERS])
+        stats = {name: values.get(f'tiered:stats:{name}', 0) for name in TIERS}
+        stats['l1_size'] = len(self.local)
+        return stats
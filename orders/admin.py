@@ -1,5 +1,6 @@
-from django.contrib import admin
-from orders.models import Order, Coupon
+from django.contrib import admin, messages
+from orders.models import Order, Coupon, IdempotencyKey, OutboxEvent
+from orders.services.refund_service import reverse_orders
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
@@ -7,7 +8,25 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ('status', 'created_at')
     search_fields = ('user__username', 'course__title', 'status')
     ordering = ('created_at',)
-    list_editable = ('status',)
+    readonly_fields = ('status',)
+    actions = ['refund_orders', 'cancel_orders']
+
+    def reverse_selected(self, request, queryset, target_status):
+        order_ids = list(queryset.values_list('id', flat=True))
+        reversed_orders = reverse_orders(order_ids, target_status)
+        skipped = len(order_ids) - len(reversed_orders)
+        self.message_user(request, f"{len(reversed_orders)} orders {target_status}.", messages.SUCCESS)
+        if skipped:
+            self.message_user(request, f"{skipped} orders could not be {target_status} from their status.",
+                              messages.WARNING)
+
+    @admin.action(description="Refund selected completed orders")
+    def refund_orders(self, request, queryset):
+        self.reverse_selected(request, queryset, 'refunded')
+
+    @admin.action(description="Cancel selected orders that are not completed yet")
+    def cancel_orders(self, request, queryset):
+        self.reverse_selected(request, queryset, 'cancelled')
 
 @admin.register(Coupon)
 class CouponAdmin(admin.ModelAdmin):
@@ -16,3 +35,17 @@ class CouponAdmin(admin.ModelAdmin):
     search_fields = ('code', 'creator__username')
     ordering = ('created_at',)
     list_editable = ('is_active',)
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'key', 'response_status', 'created_at')
+    list_filter = ('response_status', 'created_at')
+    search_fields = ('key', 'user__username')
+    ordering = ('-created_at',)
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_type', 'attempts', 'available_at', 'processed_at', 'created_at')
+    list_filter = ('event_type', 'processed_at')
+    search_fields = ('last_error',)
+    ordering = ('-created_at',)
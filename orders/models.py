@@ -11,7 +11,18 @@ class Order(models.Model):
         ('completed', 'Completed'),
         ('failed', 'Failed'),
         ('cancelled', 'Cancelled'),
+        ('refunded', 'Refunded'),
     ]
+    ACTIVE_STATUSES = ('created', 'completed')
+    # Allowed status transitions: an order is completed once the buyer is enrolled, can be
+    # cancelled before that and refunded after.
+    TRANSITIONS = {
+        'created': ('completed', 'failed', 'cancelled'),
+        'completed': ('refunded',),
+        'failed': (),
+        'cancelled': (),
+        'refunded': (),
+    }
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='created')
     user = models.ForeignKey('users.CustomUser', on_delete=models.CASCADE, related_name="orders")
@@ -22,9 +33,30 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'course'],
+                condition=models.Q(status__in=['created', 'completed']),
+                name='unique_active_order_per_course',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'status'], name='order_course_status_idx'),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.user.username} - {self.status}"
 
+    @classmethod
+    def sources_for(cls, status):
+        """Return the statuses an order can move to `status` from."""
+        return tuple(source for source, targets in cls.TRANSITIONS.items() if status in targets)
+
+    @property
+    def total_amount(self):
+        return self.amount + self.tax_amount
+
 
 class Coupon(models.Model):
     code = models.CharField(max_length=50, unique=True)
@@ -42,9 +74,76 @@ class Coupon(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     notified = models.BooleanField(default=False, help_text="Set to True if expiry email was sent.")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'notified', 'valid_until'], name='coupon_expiry_scan_idx'),
+        ]
+
     def is_valid(self):
         """Check if a coupon is active and not expired."""
         return self.is_active and timezone.now() < self.valid_until
 
+    def applies_to(self, course):
+        """Check if the coupon can be used for a course (coupons without courses are global)."""
+        course_ids = getattr(self, 'applicable_course_ids', None)
+        if course_ids is None:
+            course_ids = set(self.courses.values_list('id', flat=True))
+        return not course_ids or course.id in course_ids
+
     def __str__(self):
         return f"{self.code} - {self.discount_percentage}%"
+
+
+class OutboxEvent(models.Model):
+    """
+    Side effect of an order, recorded in the same transaction as the order itself.
+
+    Events are drained by `orders.tasks.drain_order_outbox`; a row without
+    `processed_at` is still pending and is retried from `available_at` on.
+    """
+    EVENT_TYPE_CHOICES = [
+        ('orders_placed', 'Orders placed'),
+    ]
+
+    event_type = models.CharField(max_length=50, choices=EVENT_TYPE_CHOICES)
+    payload = models.JSONField()
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at', 'id'], name='outbox_pending_idx',
+                         condition=models.Q(processed_at__isnull=True)),
+            models.Index(fields=['processed_at'], name='outbox_processed_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a client request sent with an `Idempotency-Key` header.
+
+    A row without a response marks a request that is still being processed.
+    """
+    user = models.ForeignKey('users.CustomUser', on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
@@ -1,17 +1,18 @@
 from rest_framework import serializers
 from courses.models import Course
 from .models import Order, Coupon
+from .services.coupon_cache import resolve_coupon
 
 
 class OrderSerializer(serializers.ModelSerializer):
     """
         Serializer for retrieving order information.
 
-        Includes details like the user, course, coupon, order amount,
+        Includes details like the user, course, coupon, status, order amount,
         tax amount, and timestamps.
 
         Read-only fields:
-            - User, course, coupon, amount, tax, created_at, and updated_at.
+            - User, course, coupon, status, amount, tax, created_at, and updated_at.
     """
     user = serializers.StringRelatedField(read_only=True)
     course = serializers.StringRelatedField(read_only=True)
@@ -24,12 +25,13 @@ class OrderSerializer(serializers.ModelSerializer):
             "user",
             "course",
             "coupon",
+            "status",
             "amount",
             "tax_amount",
             "created_at",
             "updated_at"
         ]
-        read_only_fields = ("amount", "tax_amount", "user", "created_at", "updated_at")
+        read_only_fields = ("status", "amount", "tax_amount", "user", "created_at", "updated_at")
 
 
 class CreateOrderSerializer(serializers.Serializer):
@@ -39,6 +41,7 @@ class CreateOrderSerializer(serializers.Serializer):
     Fields:
         - `course_title` (required): The title of the course being purchased.
         - `coupon_code` (optional): A discount code to apply to the order.
+        - `region` (optional): Region code selecting the tax rate.
 
     Validations:
         - Ensures the provided course exists.
@@ -46,6 +49,7 @@ class CreateOrderSerializer(serializers.Serializer):
     """
     course_title = serializers.CharField(required=True, help_text="Title of the course to order.")
     coupon_code = serializers.CharField(required=False, allow_blank=True, help_text="Optional discount code.")
+    region = serializers.CharField(required=False, allow_blank=True, help_text="Optional region code for tax.")
 
     def validate_course_title(self, value):
         if not Course.objects.filter(title=value).exists():
@@ -53,11 +57,85 @@ class CreateOrderSerializer(serializers.Serializer):
         return value
 
     def validate_coupon_code(self, value):
-        if value and not Coupon.objects.filter(code=value, is_active=True).exists():
-            raise serializers.ValidationError("Invalid or expired coupon code.")
+        if value:
+            coupon = resolve_coupon(value)
+            if coupon is None or not coupon.is_valid():
+                raise serializers.ValidationError("Invalid or expired coupon code.")
         return value
 
 
+class CheckoutItemSerializer(serializers.Serializer):
+    """
+    Serializer for one line of a checkout cart.
+
+    Fields:
+        - `course_title` (required): The title of the course being purchased.
+        - `coupon_code` (optional): A discount code to apply to this course.
+    """
+    course_title = serializers.CharField(required=True, help_text="Title of the course to order.")
+    coupon_code = serializers.CharField(required=False, allow_blank=True, help_text="Optional discount code.")
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """
+    Serializer for buying several courses at once.
+
+    Fields:
+        - `items` (required): The cart lines, between 1 and `MAX_ITEMS`.
+        - `region` (optional): Region code selecting the tax rate.
+    """
+    MAX_ITEMS = 50
+
+    items = CheckoutItemSerializer(many=True, allow_empty=False, help_text="Courses to buy.")
+    region = serializers.CharField(required=False, allow_blank=True, help_text="Optional region code for tax.")
+
+    def validate_items(self, value):
+        if len(value) > self.MAX_ITEMS:
+            raise serializers.ValidationError(f"A cart can contain at most {self.MAX_ITEMS} courses.")
+        return value
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of a price quote.
+
+    Fields:
+        - `course_ids` (required): Comma-separated course IDs, at most `MAX_COURSES`.
+        - `coupon_code` (optional): A discount code to apply where eligible.
+        - `region` (optional): Region code selecting the tax rate.
+    """
+    MAX_COURSES = 100
+
+    course_ids = serializers.CharField(required=True, help_text="Comma-separated course IDs.")
+    coupon_code = serializers.CharField(required=False, allow_blank=True, help_text="Optional discount code.")
+    region = serializers.CharField(required=False, allow_blank=True, help_text="Optional region code for tax.")
+
+    def validate_course_ids(self, value):
+        try:
+            course_ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+        except ValueError:
+            raise serializers.ValidationError("Course IDs must be comma-separated integers.")
+        if not course_ids:
+            raise serializers.ValidationError("At least one course ID is required.")
+        if len(course_ids) > self.MAX_COURSES:
+            raise serializers.ValidationError(f"At most {self.MAX_COURSES} courses can be quoted at once.")
+        return course_ids
+
+
+class QuoteSerializer(serializers.Serializer):
+    """
+    Serializer for one price quote (see `orders.services.pricing.Quote`).
+    """
+    course_id = serializers.IntegerField()
+    base_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    coupon_applied = serializers.BooleanField()
+    discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2)
+    final_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    tax_percentage = serializers.DecimalField(max_digits=5, decimal_places=2)
+    tax_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
 class CouponCreateSerializer(serializers.ModelSerializer):
     """
         Serializer for creating and managing coupons.
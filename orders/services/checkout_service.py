@@ -0,0 +1,145 @@
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+
+from courses.models import Course
+from orders.models import Order
+from orders.services.coupon_cache import resolve_coupons
+from orders.services.order_service import validate_coupon_for_course
+from orders.services.outbox import record_orders_placed
+from orders.services.pricing import quote_courses
+from users.models import AccountBalance
+
+
+class CheckoutService:
+    """
+        A service for buying several courses in one checkout.
+
+        Initialization Args:
+            - `user`: The user checking out.
+            - `items`: A list of `{"course_title": ..., "coupon_code": ...}` cart lines
+              (`coupon_code` is optional).
+            - `region` (optional): Region code selecting the tax rate.
+
+        Features:
+            - Loads every course and existing order of the cart with one query each, and
+              resolves coupons through the coupon cache.
+            - Prices all lines with one `quote_courses` batch per distinct coupon.
+            - Debits the balance once and bulk-creates the orders in one transaction, recording
+              a single outbox event for enrollment and the confirmation email.
+
+        Methods:
+            - `calculate_prices`: Returns the priced cart lines and the cart total.
+            - `place_orders`: Places every order of the cart, atomically.
+    """
+    def __init__(self, user, items, region=None):
+        self.user = user
+        self.region = region
+
+        titles = [item['course_title'] for item in items]
+        if len(set(titles)) != len(titles):
+            raise ValueError("Each course can only appear once in the cart.")
+
+        courses = {}
+        for course in Course.objects.filter(title__in=titles).order_by('id'):
+            courses.setdefault(course.title, course)
+        missing = [title for title in titles if title not in courses]
+        if missing:
+            raise ValueError(f"Invalid course title: {', '.join(missing)}.")
+
+        codes = {item.get('coupon_code') for item in items if item.get('coupon_code')}
+        coupons = resolve_coupons(codes)
+
+        self.lines = []
+        for item in items:
+            course = courses[item['course_title']]
+            coupon = None
+            if item.get('coupon_code'):
+                coupon = coupons.get(item['coupon_code'])
+                if coupon is None:
+                    raise ValueError(f"Invalid or expired coupon code: {item['coupon_code']}.")
+            if course.instructor_id == self.user.id:
+                raise ValueError(f"You cannot order your own course: {course.title}.")
+            if coupon:
+                validate_coupon_for_course(coupon, course)
+            self.lines.append({'course': course, 'coupon': coupon})
+
+        self.validate_not_ordered()
+
+    def validate_not_ordered(self):
+        course_ids = [line['course'].id for line in self.lines]
+        ordered = set(Order.objects.filter(
+            user=self.user, course_id__in=course_ids, status__in=Order.ACTIVE_STATUSES
+        ).values_list('course__title', flat=True))
+        if ordered:
+            raise ValueError(f"You have already ordered: {', '.join(sorted(ordered))}.")
+
+    def calculate_prices(self):
+        """
+        Price every cart line.
+
+        Returns:
+            tuple: The lines (each with `final_price`, `tax_amount` and `total_amount` added)
+            and the total amount of the cart.
+        """
+        by_coupon = {}
+        for line in self.lines:
+            coupon = line['coupon']
+            by_coupon.setdefault(coupon.code if coupon else None, (coupon, []))[1].append(line['course'])
+
+        quotes = {}
+        for coupon, courses in by_coupon.values():
+            for course_id, quote in quote_courses(courses, coupon=coupon, region=self.region).items():
+                quotes[(coupon.code if coupon else None, course_id)] = quote
+
+        priced_lines = []
+        for line in self.lines:
+            quote = quotes[(line['coupon'].code if line['coupon'] else None, line['course'].id)]
+            priced_lines.append({
+                **line,
+                'final_price': quote.final_price,
+                'tax_amount': quote.tax_amount,
+                'total_amount': quote.total_amount,
+            })
+        return priced_lines, sum((line['total_amount'] for line in priced_lines), 0)
+
+    def place_orders(self):
+        """
+        Place every order of the cart after validating the user's balance.
+
+        Locks the user's balance row like `OrderService.place_order`, creates all orders with
+        one `bulk_create`, debits the cart total with one balance update (one ledger row per
+        order) and records the orders in the outbox.
+
+        Returns:
+            list: The created `Order` objects.
+        """
+        priced_lines, cart_total = self.calculate_prices()
+
+        with transaction.atomic():
+            account_balance = get_object_or_404(AccountBalance.objects.select_for_update(), user=self.user)
+
+            self.validate_not_ordered()
+            if account_balance.balance < cart_total:
+                raise ValueError("Insufficient balance to place these orders.")
+
+            try:
+                with transaction.atomic():
+                    orders = Order.objects.bulk_create([
+                        Order(
+                            user=self.user,
+                            course=line['course'],
+                            coupon=line['coupon'],
+                            amount=line['final_price'],
+                            tax_amount=line['tax_amount'],
+                        )
+                        for line in priced_lines
+                    ])
+            except IntegrityError:
+                raise ValueError("You have already ordered one of these courses.")
+
+            account_balance.apply_transactions([
+                ('purchase', -line['total_amount'], order) for line, order in zip(priced_lines, orders)
+            ])
+            record_orders_placed(self.user, orders)
+
+        return orders
@@ -0,0 +1,94 @@
+import hashlib
+
+from django.core.cache import cache
+
+from orders.models import Coupon
+
+COUPON_CACHE_TIMEOUT = 60 * 10
+MISSING_COUPON_CACHE_TIMEOUT = 60
+MISSING_COUPON = 'missing'
+CACHED_FIELDS = (
+    'id', 'code', 'discount_percentage', 'valid_until', 'is_active', 'min_order_value', 'creator_id', 'notified',
+    'updated_at',
+)
+
+
+def coupon_cache_key(code):
+    return f"coupon_{hashlib.sha256(code.encode()).hexdigest()}"
+
+
+def _load(codes):
+    """
+    Read coupons and their applicable course IDs from the database, two queries in total.
+    """
+    coupons = {row['code']: row for row in Coupon.objects.filter(code__in=codes).values(*CACHED_FIELDS)}
+    for row in coupons.values():
+        row['course_ids'] = []
+    by_id = {row['id']: row for row in coupons.values()}
+    links = Coupon.courses.through.objects.filter(coupon_id__in=by_id).values_list('coupon_id', 'course_id')
+    for coupon_id, course_id in links:
+        by_id[coupon_id]['course_ids'].append(course_id)
+    return coupons
+
+
+def _build(data):
+    """
+    Rebuild a `Coupon` instance from cached data without touching the database.
+
+    The instance behaves like a fetched row (it can be assigned to `Order.coupon`), and
+    carries `applicable_course_ids` so `Coupon.applies_to` needs no query.
+    """
+    course_ids = data['course_ids']
+    coupon = Coupon(**{field: data[field] for field in CACHED_FIELDS})
+    coupon._state.adding = False
+    coupon._state.db = 'default'
+    coupon.applicable_course_ids = frozenset(course_ids)
+    return coupon
+
+
+def resolve_coupons(codes):
+    """
+    Resolve coupon codes to `Coupon` instances, reading through the cache.
+
+    Cache misses for all codes are filled with one batch of queries, and unknown codes are
+    cached briefly too, so repeated lookups of popular (or bogus) codes cost no queries.
+
+    Args:
+        codes (Iterable[str]): The coupon codes to resolve.
+
+    Returns:
+        dict: Maps each existing code to its `Coupon`; unknown codes are left out.
+    """
+    codes = set(codes)
+    keys = {coupon_cache_key(code): code for code in codes}
+    cached = cache.get_many(list(keys))
+    found = {keys[key]: data for key, data in cached.items()}
+
+    missing = codes - set(found)
+    if missing:
+        loaded = _load(missing)
+        cache.set_many({coupon_cache_key(code): data for code, data in loaded.items()}, timeout=COUPON_CACHE_TIMEOUT)
+        unknown = missing - set(loaded)
+        if unknown:
+            cache.set_many({coupon_cache_key(code): MISSING_COUPON for code in unknown},
+                           timeout=MISSING_COUPON_CACHE_TIMEOUT)
+        found.update(loaded)
+
+    return {code: _build(data) for code, data in found.items() if data != MISSING_COUPON}
+
+
+def resolve_coupon(code):
+    """
+    Resolve a single coupon code, see `resolve_coupons`.
+
+    Returns:
+        Coupon: The coupon, or None if the code does not exist.
+    """
+    return resolve_coupons([code]).get(code)
+
+
+def invalidate_coupons(codes):
+    """
+    Drop cached coupons so the next lookup reads the database.
+    """
+    cache.delete_many([coupon_cache_key(code) for code in codes if code])
@@ -0,0 +1,144 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from orders.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class IdempotencyConflict(Exception):
+    """
+    Raised when an idempotency key cannot be used for the current request.
+
+    Attributes:
+        - `in_progress`: True when the original request is still being processed,
+          False when the key was already used with a different payload.
+    """
+    def __init__(self, message, in_progress):
+        super().__init__(message)
+        self.in_progress = in_progress
+
+
+class IdempotentRequest:
+    """
+        Replays stored responses for requests retried with the same `Idempotency-Key`.
+
+        Initialization Args:
+            - `user`: The user sending the request (keys are scoped per user).
+            - `key`: The value of the `Idempotency-Key` header.
+            - `path`: The request path.
+            - `payload`: The request data, fingerprinted to detect key reuse with a different body.
+
+        Features:
+            - Looks up completed responses in the cache first and the database second,
+              so a retry costs a single cache read.
+            - Reserves the key with a unique row before the request runs, so two
+              concurrent retries can never both execute.
+            - A reservation is a lease of `settings.IDEMPOTENCY_KEY_LEASE`: if the worker
+              dies before completing or releasing it, a retry after the lease takes it over
+              instead of getting 409 for the whole window.
+            - Responses are kept for `settings.IDEMPOTENCY_KEY_WINDOW`.
+
+        Methods:
+            - `stored_response`: Returns `(status, body)` of a completed request, or None.
+            - `reserve`: Claims the key before processing the request.
+            - `complete`: Stores the response of a successful request.
+            - `release`: Frees the key after a failed request so it can be retried.
+    """
+    def __init__(self, user, key, path, payload):
+        self.user = user
+        self.key = key
+        digest_source = json.dumps({'path': path, 'payload': payload}, sort_keys=True, cls=JSONEncoder)
+        self.fingerprint = hashlib.sha256(digest_source.encode()).hexdigest()
+        self.window = settings.IDEMPOTENCY_KEY_WINDOW
+        self.lease = settings.IDEMPOTENCY_KEY_LEASE
+        self.record_id = None
+        self.cache_key = f"idempotency_{user.id}_{hashlib.sha256(key.encode()).hexdigest()}"
+
+    def _check_fingerprint(self, fingerprint):
+        if fingerprint != self.fingerprint:
+            raise IdempotencyConflict("This Idempotency-Key was already used with a different request.",
+                                      in_progress=False)
+
+    def _active_rows(self):
+        return IdempotencyKey.objects.filter(
+            user=self.user, key=self.key, created_at__gte=timezone.now() - self.window
+        )
+
+    def stored_response(self):
+        cached = cache.get(self.cache_key)
+        if cached is not None:
+            self._check_fingerprint(cached['fingerprint'])
+            return cached['status'], cached['body']
+
+        record = self._active_rows().first()
+        if record is None:
+            return None
+        self._check_fingerprint(record.request_fingerprint)
+        if record.response_status is None:
+            if record.created_at < timezone.now() - self.lease:
+                # Abandoned by a dead worker: `reserve` takes it over.
+                return None
+            raise IdempotencyConflict("A request with this Idempotency-Key is still being processed.",
+                                      in_progress=True)
+        self._cache(record.response_status, record.response_body)
+        return record.response_status, record.response_body
+
+    def reserve(self):
+        now = timezone.now()
+        IdempotencyKey.objects.filter(user=self.user, key=self.key).filter(
+            Q(created_at__lt=now - self.window) | Q(response_status__isnull=True, created_at__lt=now - self.lease)
+        ).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=self.user, key=self.key, request_fingerprint=self.fingerprint
+                )
+        except IntegrityError:
+            # A concurrent retry reserved the key first.
+            if self.stored_response() is None:
+                raise IdempotencyConflict("A request with this Idempotency-Key is still being processed.",
+                                          in_progress=True)
+            return False
+        self.record_id = record.id
+        return True
+
+    def complete(self, status_code, body):
+        body = json.loads(json.dumps(body, cls=JSONEncoder))
+        # Only the reservation made by this request: if its lease was taken over, the
+        # new holder's outcome wins.
+        updated = IdempotencyKey.objects.filter(pk=self.record_id, response_status__isnull=True).update(
+            response_status=status_code, response_body=body
+        )
+        if updated:
+            self._cache(status_code, body)
+
+    def release(self):
+        IdempotencyKey.objects.filter(pk=self.record_id, response_status__isnull=True).delete()
+
+    def _cache(self, status_code, body):
+        cache.set(
+            self.cache_key,
+            {'fingerprint': self.fingerprint, 'status': status_code, 'body': body},
+            timeout=int(self.window.total_seconds()),
+        )
+
+
+def purge_expired_keys():
+    """
+    Delete stored idempotency keys older than the replay window.
+
+    Returns:
+        int: The number of deleted keys.
+    """
+    deleted, _ = IdempotencyKey.objects.filter(
+        created_at__lt=timezone.now() - settings.IDEMPOTENCY_KEY_WINDOW
+    ).delete()
+    return deleted
@@ -1,8 +1,28 @@
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
-from orders.services.order_calculation import calculate_final_price
 from users.models import AccountBalance
 from courses.models import Course
-from orders.models import Order, Coupon
+from orders.models import Order
+from orders.services.coupon_cache import resolve_coupon
+from orders.services.outbox import record_orders_placed
+from orders.services.pricing import quote_courses
+
+
+def validate_coupon_for_course(coupon, course):
+    """
+    Validate that a coupon can be applied to a course.
+
+    Raises:
+        ValueError: If the coupon is expired, inactive, limited to other courses,
+        or the course price is below its minimum.
+    """
+    # Ensure the coupon is active and not expired
+    if not coupon.is_valid():
+        raise ValueError("The coupon is either expired or inactive.")
+    if not coupon.applies_to(course):
+        raise ValueError(f"The coupon does not apply to the course: {course.title}.")
+    if coupon.min_order_value and course.price < coupon.min_order_value:
+        raise ValueError(f"The course price must exceed {coupon.min_order_value:.2f} to use this coupon.")
 
 
 class OrderService:
@@ -13,70 +33,85 @@ class OrderService:
             - `user`: The user placing the order.
             - `course_title`: The title of the course to be ordered.
             - `coupon_code` (optional): Discount coupon code.
+            - `region` (optional): Region code selecting the tax rate.
 
         Features:
             - Validates course eligibility.
-            - Validates optional coupon eligibility.
-            - Calculates the final price including discounts and taxes.
+            - Validates optional coupon eligibility, resolving the coupon through the coupon cache.
+            - Prices the course through the pricing engine (`quote_courses`).
             - Places an order and deducts the user's balance.
+            - Records the order's side effects (enrollment, email) in the outbox, in the same transaction.
 
         Methods:
             - `validate_coupon`: Ensures the coupon is valid, active, and meets minimum thresholds.
             - `calculate_price`: Calculates the final, tax, and total amounts for the course.
-            - `place_order`: Places the order while deducting the balance from the user.
+            - `has_active_order`: Checks whether the user already has an active order for the course.
+            - `place_order`: Places the order while deducting the balance from the user, atomically.
     """
-    def __init__(self, user, course_title, coupon_code=None):
+    def __init__(self, user, course_title, coupon_code=None, region=None):
         self.user = user
+        self.region = region
         self.course = get_object_or_404(Course, title=course_title)
-        self.coupon = Coupon.objects.filter(code=coupon_code).first() if coupon_code else None
+        self.coupon = resolve_coupon(coupon_code) if coupon_code else None
+        if coupon_code and self.coupon is None:
+            raise ValueError("Invalid or expired coupon code.")
 
         if self.course.instructor == self.user:
             raise ValueError("You cannot order your own course.")
-        if Order.objects.filter(user=self.user, course=self.course).exists():
+        if self.has_active_order():
             raise ValueError("You have already ordered this course.")
         if self.coupon:
             self.validate_coupon()
 
+    def has_active_order(self):
+        return Order.objects.filter(
+            user=self.user, course=self.course, status__in=Order.ACTIVE_STATUSES
+        ).exists()
+
     def validate_coupon(self):
         """
         Validate the coupon for the selected course and check its rules.
         """
-        # Ensure the coupon is active and not expired
-        if not self.coupon.is_valid():
-            raise ValueError("The coupon is either expired or inactive.")
-        if self.coupon.min_order_value and self.course.price < self.coupon.min_order_value:
-            raise ValueError(f"The course price must exceed {self.coupon.min_order_value:.2f} to use this coupon.")
+        validate_coupon_for_course(self.coupon, self.course)
 
     def calculate_price(self):
         """
         Calculate the final price, tax, and total amount after applying the coupon discount.
         """
-        # Calculate discount or set it to 0 if no coupon is provided
-        discount_percentage = self.coupon.discount_percentage if self.coupon else 0
-
-        final_price, tax_amount, total_amount = calculate_final_price(
-            base_price=self.course.price,
-            discount_percentage=discount_percentage,
-            tax_percentage=5
-        )
-        return final_price, tax_amount, total_amount
+        quote = quote_courses([self.course], coupon=self.coupon, region=self.region)[self.course.id]
+        return quote.final_price, quote.tax_amount, quote.total_amount
 
     def place_order(self):
         """
         Place the order after validating the user's balance and applying discounts.
+
+        The balance row is locked for the whole checkout, so concurrent checkouts of the
+        same user run one after the other: the duplicate-order and balance checks always
+        see the committed result of the previous checkout. The unique constraint on active
+        orders backs the duplicate check, and the debit itself is a conditional update.
         """
         final_price, tax_amount, total_amount = self.calculate_price()
-        account_balance = get_object_or_404(AccountBalance, user=self.user)
 
-        if account_balance.balance < total_amount:
-            raise ValueError("Insufficient balance to place this order.")
+        with transaction.atomic():
+            account_balance = get_object_or_404(AccountBalance.objects.select_for_update(), user=self.user)
+
+            if self.has_active_order():
+                raise ValueError("You have already ordered this course.")
+            if account_balance.balance < total_amount:
+                raise ValueError("Insufficient balance to place this order.")
 
-        account_balance.subtract_balance(total_amount)
+            try:
+                with transaction.atomic():
+                    order = Order.objects.create(
+                        user=self.user,
+                        course=self.course,
+                        coupon=self.coupon,
+                        amount=final_price,
+                        tax_amount=tax_amount,
+                    )
+            except IntegrityError:
+                raise ValueError("You have already ordered this course.")
 
-        return Order.objects.create(
-            user=self.user,
-            course=self.course,
-            coupon=self.coupon,
-            amount=final_price,
-            tax_amount=tax_amount,
-        )
+            account_balance.subtract_balance(total_amount, kind='purchase', order=order)
+            record_orders_placed(self.user, [order])
+        return order
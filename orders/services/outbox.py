@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from courses.cache import invalidate_user_enrollments
+from courses.models import Enrollment
+from courses.services.popularity import record_enrollments
+from orders.models import Order, OutboxEvent
+from users.utils.email import queue_emails
+
+ORDERS_PLACED = 'orders_placed'
+DRAIN_BATCH_SIZE = 100
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def record_orders_placed(user, orders):
+    """
+    Record the side effects of newly placed orders in the outbox.
+
+    Must be called inside the transaction that creates the orders, so the event exists
+    if and only if the orders do (a drain is scheduled on commit, see `orders.signals`).
+
+    Args:
+        user: The user who placed the orders.
+        orders (list): The created `Order` objects.
+
+    Returns:
+        OutboxEvent: The recorded event.
+    """
+    return OutboxEvent.objects.create(
+        event_type=ORDERS_PLACED,
+        payload={'user_id': user.id, 'order_ids': [order.id for order in orders]},
+    )
+
+
+def _fulfill(events):
+    """
+    Enroll the buyers of every order in `events` and mark the orders completed.
+
+    The orders are locked first, so an order cancelled concurrently is either skipped
+    here or finds itself completed (and has to be refunded instead).
+    """
+    order_ids = [order_id for event in events for order_id in event.payload['order_ids']]
+    rows = list(Order.objects.select_for_update().filter(
+        id__in=order_ids, status='created'
+    ).values_list('id', 'user_id', 'course_id'))
+    if not rows:
+        return
+
+    pairs = {(user_id, course_id) for _, user_id, course_id in rows}
+    user_ids = {user_id for user_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+    enrolled = set(Enrollment.objects.filter(
+        user_id__in=user_ids, course_id__in=course_ids
+    ).values_list('user_id', 'course_id'))
+    new_pairs = pairs - enrolled
+
+    Enrollment.objects.bulk_create(
+        [Enrollment(user_id=user_id, course_id=course_id) for user_id, course_id in new_pairs],
+        ignore_conflicts=True,
+    )
+    record_enrollments(course_id for _, course_id in new_pairs)
+    Order.objects.filter(id__in=[order_id for order_id, _, _ in rows]).update(status='completed')
+
+    affected_users = {user_id for user_id, _ in new_pairs}
+    transaction.on_commit(lambda: invalidate_user_enrollments(affected_users))
+
+
+def _confirmation_emails(events):
+    """
+    Build one confirmation email per event, loading the orders of the whole batch with one query.
+    """
+    order_ids = [order_id for event in events for order_id in event.payload['order_ids']]
+    orders = Order.objects.filter(
+        pk__in=order_ids, status__in=Order.ACTIVE_STATUSES
+    ).select_related('user', 'course').in_bulk()
+
+    messages = []
+    for event in events:
+        event_orders = [orders[order_id] for order_id in event.payload['order_ids'] if order_id in orders]
+        if not event_orders:
+            continue
+        if len(event_orders) == 1:
+            message = f'Your order "{event_orders[0].course.title}" was placed successfully!'
+        else:
+            course_lines = "\n".join(f'- "{order.course.title}"' for order in event_orders)
+            message = f'Your orders were placed successfully:\n{course_lines}'
+        messages.append(('Order Confirmation', message, [event_orders[0].user.email]))
+    return messages
+
+
+def _retry_delay(attempts):
+    return min(timedelta(seconds=30 * 2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+
+def drain_outbox(batch_size=DRAIN_BATCH_SIZE):
+    """
+    Process one batch of pending outbox events.
+
+    Events are claimed with `SELECT ... FOR UPDATE SKIP LOCKED`, so several workers can
+    drain concurrently without processing an event twice. Enrollment (which completes
+    the orders) is done for the whole batch at once, and confirmation emails are handed to the mail queue in the same
+    transaction that marks the events processed, so each email is queued exactly once.
+    If the batch fails, its events stay pending and are retried with exponential backoff.
+
+    Args:
+        batch_size (int): The maximum number of events to process.
+
+    Returns:
+        int: The number of events claimed (0 when the outbox is empty).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, available_at__lte=now)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        for event in events:
+            event.attempts += 1
+        try:
+            with transaction.atomic():
+                _fulfill(events)
+                queue_emails(_confirmation_emails(events))
+        except Exception as e:
+            for event in events:
+                event.last_error = str(e)
+                event.available_at = now + _retry_delay(event.attempts)
+            OutboxEvent.objects.bulk_update(events, ['attempts', 'available_at', 'last_error'])
+        else:
+            for event in events:
+                event.processed_at = now
+                event.last_error = ''
+            OutboxEvent.objects.bulk_update(events, ['attempts', 'processed_at', 'last_error'])
+    return len(events)
+
+
+def purge_processed_events():
+    """
+    Delete processed outbox events older than `settings.ORDER_OUTBOX_RETENTION`.
+
+    Returns:
+        int: The number of deleted events.
+    """
+    deleted, _ = OutboxEvent.objects.filter(
+        processed_at__lt=timezone.now() - settings.ORDER_OUTBOX_RETENTION
+    ).delete()
+    return deleted
@@ -0,0 +1,131 @@
+import hashlib
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from orders.services.order_calculation import calculate_final_price
+
+QUOTE_CACHE_TIMEOUT = 60 * 15
+CENT = Decimal('0.01')
+
+Quote = namedtuple('Quote', [
+    'course_id', 'base_price', 'coupon_applied', 'discount_percentage',
+    'final_price', 'tax_percentage', 'tax_amount', 'total_amount',
+])
+"""
+Price of one course for a pricing context.
+
+All amounts are `Decimal` values rounded to cents, and `total_amount` is exactly
+`final_price + tax_amount`.
+"""
+
+
+class SettingsTaxTable:
+    """
+        Tax table read from `settings.PRICING_TAX_RATES`.
+
+        Maps a region code to a tax percentage, falling back to the `default` entry.
+        Another table can be plugged in with `settings.PRICING_TAX_TABLE`; it only needs
+        a `rate_for(region)` method returning a `Decimal` percentage.
+    """
+    def rate_for(self, region):
+        rates = settings.PRICING_TAX_RATES
+        return Decimal(str(rates.get(region, rates['default'])))
+
+
+def get_tax_table():
+    return import_string(settings.PRICING_TAX_TABLE)()
+
+
+def _to_cents(amount):
+    return Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _coupon_terms(coupon, course):
+    """
+    Fingerprint every coupon field the quote of `course` depends on.
+
+    The terms are read from the coupon itself rather than from `updated_at`, which is not
+    touched by changes to the applicable courses or by `QuerySet.update()` writes.
+    """
+    if coupon is None:
+        return 'none'
+    valid_until = coupon.valid_until.timestamp() if coupon.valid_until else 0
+    return (f"{coupon.id}.{coupon.discount_percentage}.{coupon.min_order_value}.{int(coupon.is_active)}."
+            f"{valid_until}.{int(coupon.applies_to(course))}")
+
+
+def _quote_timeout(coupon):
+    # A quote must not outlive the coupon it was computed with.
+    if coupon is None:
+        return QUOTE_CACHE_TIMEOUT
+    remaining = int((coupon.valid_until - timezone.now()).total_seconds())
+    return max(1, min(QUOTE_CACHE_TIMEOUT, remaining))
+
+
+def _quote_cache_key(course, coupon, region, tax_percentage):
+    terms = hashlib.sha256(_coupon_terms(coupon, course).encode()).hexdigest()[:16]
+    return f"quote_{course.id}_{course.price}_{terms}_{region or 'default'}_{tax_percentage}"
+
+
+def _compute_quote(course, coupon, tax_percentage):
+    coupon_applied = bool(coupon) and coupon.is_valid() and coupon.applies_to(course) and not (
+        coupon.min_order_value and course.price < coupon.min_order_value
+    )
+    discount_percentage = coupon.discount_percentage if coupon_applied else Decimal(0)
+
+    final_price, _, _ = calculate_final_price(base_price=course.price, discount_percentage=discount_percentage)
+    final_price = _to_cents(final_price)
+    tax_amount = _to_cents(final_price * tax_percentage / Decimal(100))
+    return Quote(
+        course_id=course.id,
+        base_price=course.price,
+        coupon_applied=coupon_applied,
+        discount_percentage=Decimal(discount_percentage),
+        final_price=final_price,
+        tax_percentage=tax_percentage,
+        tax_amount=tax_amount,
+        total_amount=final_price + tax_amount,
+    )
+
+
+def quote_courses(courses, coupon=None, region=None):
+    """
+    Price a batch of courses for one pricing context in a single pass.
+
+    Quotes are cached per course price, coupon terms (discount, limits, validity and
+    whether it applies to the course) and region tax rate, so a changed price or coupon
+    never serves a stale quote. A coupon that is
+    invalid or does not apply to a course is ignored for that course (see `coupon_applied`).
+
+    Args:
+        courses (Iterable[Course]): The courses to price.
+        coupon (Coupon, optional): A coupon to apply where eligible.
+        region (str, optional): Region code selecting the tax rate (default is the default rate).
+
+    Returns:
+        dict: Maps each course ID to its `Quote`.
+    """
+    courses = list(courses)
+    if coupon is not None and getattr(coupon, 'applicable_course_ids', None) is None:
+        # Coupons from the coupon cache carry their courses; load them once for the others.
+        coupon.applicable_course_ids = frozenset(coupon.courses.values_list('id', flat=True))
+    tax_percentage = get_tax_table().rate_for(region)
+    keys = {_quote_cache_key(course, coupon, region, tax_percentage): course for course in courses}
+
+    cached = cache.get_many(list(keys))
+    quotes = {keys[key].id: Quote(*values) for key, values in cached.items()}
+
+    computed = {}
+    for key, course in keys.items():
+        if course.id not in quotes:
+            quote = _compute_quote(course, coupon, tax_percentage)
+            quotes[course.id] = quote
+            computed[key] = tuple(quote)
+    if computed:
+        cache.set_many(computed, timeout=_quote_timeout(coupon))
+    return quotes
@@ -0,0 +1,123 @@
+from django.db import transaction
+
+from courses.cache import invalidate_user_enrollments
+from courses.models import Enrollment
+from courses.services.popularity import record_unenrollments
+from orders.models import Order
+from users.models import AccountBalance
+from users.utils.email import queue_emails
+
+REVERSAL_BATCH_SIZE = 500
+REVERSAL_KINDS = {
+    'cancelled': 'Cancelled',
+    'refunded': 'Refunded',
+}
+
+
+def _notification_emails(orders, status):
+    by_user = {}
+    for order in orders:
+        by_user.setdefault(order.user, []).append(order)
+
+    messages = []
+    for user, user_orders in by_user.items():
+        order_lines = "\n".join(
+            f'- "{order.course.title}": {order.total_amount:.2f} returned ({order.status})' for order in user_orders
+        )
+        messages.append((
+            f'Order {REVERSAL_KINDS[status]}',
+            f"Hi {user.username},\n\nThe following orders were {REVERSAL_KINDS[status].lower()} and credited to "
+            f"your balance:\n"
+            f"{order_lines}",
+            [user.email],
+        ))
+    return messages
+
+
+def _reverse_batch(order_ids, status):
+    """
+    Move one batch of orders to `status` and undo their effects, in one transaction.
+
+    Returns:
+        list: The reversed orders (orders not in an allowed source status are skipped).
+    """
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(of=('self',))
+            .filter(id__in=order_ids, status__in=Order.sources_for(status))
+            .select_related('user', 'course')
+        )
+        if not orders:
+            return []
+
+        Order.objects.filter(id__in=[order.id for order in orders]).update(status=status)
+        for order in orders:
+            order.status = status
+
+        AccountBalance.credit_accounts([
+            (order.user_id, 'refund', order.total_amount, order) for order in orders
+        ])
+
+        pairs = {(order.user_id, order.course_id) for order in orders}
+        enrollments = [
+            (enrollment_id, user_id, course_id, enrolled_at)
+            for enrollment_id, user_id, course_id, enrolled_at in Enrollment.objects.filter(
+                user_id__in={user_id for user_id, _ in pairs},
+                course_id__in={course_id for _, course_id in pairs},
+            ).values_list('id', 'user_id', 'course_id', 'enrolled_at')
+            if (user_id, course_id) in pairs
+        ]
+        Enrollment.objects.filter(id__in=[enrollment_id for enrollment_id, _, _, _ in enrollments]).delete()
+        record_unenrollments((course_id, enrolled_at) for _, _, course_id, enrolled_at in enrollments)
+
+        queue_emails(_notification_emails(orders, status))
+        affected_users = {user_id for _, user_id, _, _ in enrollments}
+        transaction.on_commit(lambda: invalidate_user_enrollments(affected_users))
+    return orders
+
+
+def reverse_orders(order_ids, status, batch_size=REVERSAL_BATCH_SIZE):
+    """
+    Cancel or refund orders in batches.
+
+    Each batch runs in its own transaction with a handful of set-based queries: the orders
+    are locked and moved to `status` if the transition is allowed (see `Order.TRANSITIONS`),
+    their totals are credited back to the buyers' balances, their enrollments are removed,
+    popularity counters are decremented and every buyer gets one notification email.
+    This keeps a mass refund (e.g. after a course is taken down) to a few queries per
+    thousand orders.
+
+    Args:
+        order_ids (Iterable[int]): The orders to reverse.
+        status (str): `'cancelled'` (for orders not yet completed) or `'refunded'` (for completed orders).
+        batch_size (int): The number of orders handled per transaction.
+
+    Returns:
+        list: The reversed orders.
+    """
+    if status not in REVERSAL_KINDS:
+        raise ValueError(f"Orders cannot be reversed to status: {status}.")
+
+    order_ids = list(order_ids)
+    reversed_orders = []
+    for start in range(0, len(order_ids), batch_size):
+        reversed_orders.extend(_reverse_batch(order_ids[start:start + batch_size], status))
+    return reversed_orders
+
+
+def reverse_order(order, status):
+    """
+    Cancel or refund a single order, see `reverse_orders`.
+
+    Raises:
+        ValueError: If the order cannot move to `status` from its current status.
+
+    Returns:
+        Order: The reversed order.
+    """
+    reversed_orders = reverse_orders([order.id], status)
+    if not reversed_orders:
+        order.refresh_from_db(fields=['status'])
+        raise ValueError(f"An order that is {order.get_status_display().lower()} cannot be "
+                         f"{REVERSAL_KINDS[status].lower()}.")
+    return reversed_orders[0]
@@ -1,40 +1,69 @@
-from django.dispatch import Signal, receiver
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
 
-from courses.models import Enrollment
+from orders.models import Coupon, OutboxEvent
+from orders.services.coupon_cache import invalidate_coupons
+from orders.tasks import drain_order_outbox
 
 
-order_success = Signal()
-"""
-Signal to broadcast upon successful course purchase.
+@receiver(post_save, sender=OutboxEvent)
+def schedule_outbox_drain(sender, instance, created, **kwargs):
+    """
+    Signal receiver that drains the order outbox once a new event is committed.
 
-Broadcasts:
-    - `user`: The user who purchased the course.
-    - `course`: The course that was purchased.
-"""
+    The drain is scheduled as a robust callback: if the broker is unavailable the error
+    is logged instead of failing the already committed request, and the event stays
+    pending until the periodic drain picks it up.
+    """
+    if created:
+        transaction.on_commit(drain_order_outbox.delay, robust=True)
 
 
-@receiver(order_success)
-def enroll_user_after_order(sender, **kwargs):
+@receiver(pre_save, sender=Coupon)
+def remember_previous_coupon_code(sender, instance, **kwargs):
+    """
+    Signal receiver that records the stored code of a coupon about to be saved,
+    so a renamed coupon is also evicted from the cache under its old code.
     """
-    Signal receiver to enroll a user in a course after a successful purchase.
+    instance._previous_code = None
+    if instance.pk:
+        instance._previous_code = Coupon.objects.filter(pk=instance.pk).values_list('code', flat=True).first()
 
-    Args:
-        sender: The model class that sent the signal.
-        user: The user who purchased the course (required).
-        course: The purchased course (required).
 
-    Behavior:
-        - Automatically enrolls the user in the course if not already enrolled.
-        - Handles cases where enrollment already exists or data is missing.
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_cached_coupon(sender, instance, **kwargs):
     """
-    user = kwargs.get('user')
-    course = kwargs.get('course')
+    Signal receiver that evicts a written coupon from the coupon cache.
+
+    Covers writes from `CouponViewSet` and the admin. The eviction runs on commit, so
+    a concurrent lookup cannot re-cache the row as it was before the write.
+    """
+    codes = [instance.code, getattr(instance, '_previous_code', None)]
+    transaction.on_commit(lambda: invalidate_coupons(codes))
 
-    if not user or not course:
-        return
 
-    if not Enrollment.objects.filter(user=user, course=course).exists():
-        Enrollment.objects.create(user=user, course=course)
-        print(f"User {user.username} has been enrolled in the course: {course.title}.")
+@receiver(m2m_changed, sender=Coupon.courses.through)
+def invalidate_cached_coupon_courses(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal receiver that evicts coupons whose applicable courses changed.
+
+    A reverse clear (`course.applicable_coupons.clear()`) carries no `pk_set`, so the
+    coupons of the course are collected before the clear and evicted after it.
+    """
+    if reverse and action == 'pre_clear':
+        instance._cleared_coupon_codes = list(instance.applicable_coupons.values_list('code', flat=True))
+        return
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        codes = [instance.code]
+    elif action == 'post_clear':
+        codes = getattr(instance, '_cleared_coupon_codes', [])
+    elif pk_set:
+        codes = list(Coupon.objects.filter(pk__in=pk_set).values_list('code', flat=True))
     else:
-        print(f"User {user.username} is already enrolled in the course: {course.title}.")
+        return
+    if codes:
+        transaction.on_commit(lambda: invalidate_coupons(codes))
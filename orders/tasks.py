@@ -1,71 +1,62 @@
-import os
 from datetime import timedelta
 
 from celery import shared_task
-from django.core.mail import send_mail
+from django.db import transaction
 from django.utils.timezone import now
 
-from orders.models import Order, Coupon
+from orders.models import Coupon
+from orders.services.coupon_cache import invalidate_coupons
+from orders.services.idempotency import purge_expired_keys
+from orders.services.outbox import DRAIN_BATCH_SIZE, drain_outbox, purge_processed_events
+from users.utils.email import queue_emails
 
 
 @shared_task
-def send_order_confirmation_email(order_id, user_email):
+def drain_order_outbox():
     """
-        Task to send an order confirmation email to the user.
-
-        Args:
-            order_id (int): The ID of the placed order.
-            user_email (str): The email address of the user.
+        Task to process pending order outbox events (enrollment, cache invalidation and
+        confirmation emails) until the outbox is empty.
 
         Returns:
-            str: Status message indicating success or failure.
+            str: Status message indicating the number of processed events.
     """
-    try:
-        order = Order.objects.get(pk=order_id)
-        send_mail(
-            'Order Confirmation',
-            f'Your order "{order.course.title}" was placed successfully!',
-            os.getenv('EMAIL_HOST_USER'),
-            [user_email],
-            fail_silently=False,
-        )
-        return f"Order confirmation email sent to {user_email} for Order ID: {order_id}"
-    except Order.DoesNotExist:
-        return f"Order with ID {order_id} does not exist."
+    total = 0
+    while True:
+        claimed = drain_outbox()
+        total += claimed
+        if claimed < DRAIN_BATCH_SIZE:
+            break
+    return f"Processed {total} order outbox events."
 
 
 @shared_task
-def send_coupon_expiry_notification(coupon_id):
+def purge_processed_outbox_events():
     """
-    Task to notify the creator of a coupon that's nearing its expiration.
-
-    Args:
-        coupon_id (int): The ID of the coupon to notify about.
+    Task to delete processed order outbox events older than the retention window.
 
     Returns:
-        str: Status message indicating success or failure.
+        str: Status message indicating the number of deleted events.
     """
-    try:
-        coupon = Coupon.objects.get(id=coupon_id)
-        if coupon.is_active and not coupon.notified:
-            send_mail(
-                subject="Your Coupon is About to Expire!",
-                message=f"Hi {coupon.creator.username},\n\nYour coupon '{coupon.code}' "
-                        f"will expire on {coupon.valid_until.strftime('%Y-%m-%d %H:%M:%S')}. "
-                        "Make sure your users take advantage of it before time runs out!",
-                from_email=os.getenv('EMAIL_HOST_USER'),
-                recipient_list=[coupon.creator.email],
-                fail_silently=False,
-            )
+    deleted = purge_processed_events()
+    return f"Purged {deleted} processed outbox events."
 
-            coupon.notified = True
-            coupon.save()
-            return f"Expiry notification sent for Coupon ID: {coupon_id}"
 
-    except Coupon.DoesNotExist:
-        return f"Coupon with ID {coupon_id} does not exist."
-    except Exception as e:
-        return str(e)
+def _expiry_digest(username, coupons):
+    if len(coupons) == 1:
+        coupon = coupons[0]
+        return (
+            f"Hi {username},\n\nYour coupon '{coupon['code']}' "
+            f"will expire on {coupon['valid_until'].strftime('%Y-%m-%d %H:%M:%S')}. "
+            "Make sure your users take advantage of it before time runs out!"
+        )
+    coupon_lines = "\n".join(
+        f"- '{coupon['code']}' expires on {coupon['valid_until'].strftime('%Y-%m-%d %H:%M:%S')}"
+        for coupon in coupons
+    )
+    return (
+        f"Hi {username},\n\nThe following coupons are about to expire:\n{coupon_lines}\n\n"
+        "Make sure your users take advantage of them before time runs out!"
+    )
 
 
 @shared_task
@@ -73,21 +64,57 @@ def scan_and_notify_expiring_coupons():
     """
     Task to identify and notify about coupons that are expiring soon.
 
-    Coupons that are within 2 days of expiration and still active are included in the notification process.
+    Coupons that are within 2 days of expiration and still active are claimed in one
+    transaction: the rows are locked with `SELECT ... FOR UPDATE SKIP LOCKED` and flagged
+    as notified with a single `UPDATE`, so overlapping runs never notify twice. Each
+    creator gets one digest email listing all of their expiring coupons.
 
     Returns:
-        str: Status message indicating the number of expiring coupons found and notified.
+        str: Status message indicating the number of expiring coupons and creators notified.
     """
-    expiration_threshold = now() + timedelta(days=2)
+    current_time = now()
+    expiration_threshold = current_time + timedelta(days=2)
+
+    with transaction.atomic():
+        expiring_coupons = list(
+            Coupon.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(
+                is_active=True,
+                notified=False,
+                valid_until__gte=current_time,
+                valid_until__lte=expiration_threshold,
+            )
+            .order_by('valid_until')
+            .values('id', 'code', 'valid_until', 'creator__username', 'creator__email')
+        )
+        if not expiring_coupons:
+            return "Found and notified for 0 expiring coupons."
+
+        Coupon.objects.filter(id__in=[coupon['id'] for coupon in expiring_coupons]).update(notified=True)
+
+        by_creator = {}
+        for coupon in expiring_coupons:
+            by_creator.setdefault((coupon['creator__username'], coupon['creator__email']), []).append(coupon)
+        queue_emails(
+            ("Your Coupon is About to Expire!" if len(coupons) == 1 else "Your Coupons are About to Expire!",
+             _expiry_digest(username, coupons),
+             [email])
+            for (username, email), coupons in by_creator.items()
+        )
+
+        codes = [coupon['code'] for coupon in expiring_coupons]
+        transaction.on_commit(lambda: invalidate_coupons(codes))
+
+    return f"Found and notified for {len(expiring_coupons)} expiring coupons ({len(by_creator)} creators)."
 
-    expiring_coupons = Coupon.objects.filter(
-        valid_until__lte=expiration_threshold,
-        valid_until__gte=now(),
-        is_active=True,
-        notified=False
-    )
 
-    for coupon in expiring_coupons:
-        send_coupon_expiry_notification.delay(coupon.id)
+@shared_task
+def purge_expired_idempotency_keys():
+    """
+    Task to delete stored idempotency keys older than the replay window.
 
-    return f"Found and notified for {len(expiring_coupons)} expiring coupons."
+    Returns:
+        str: Status message indicating the number of deleted keys.
+    """
+    deleted = purge_expired_keys()
+    return f"Purged {deleted} expired idempotency keys."
@@ -1,3 +1,295 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from courses.models import Course, CoursePopularity, Enrollment
+from edunexus.testing import clear_caches
+from orders.models import Coupon, IdempotencyKey, Order, OutboxEvent
+from orders.services.coupon_cache import invalidate_coupons, resolve_coupon
+from orders.services.idempotency import IdempotencyConflict, IdempotentRequest
+from orders.services.order_service import OrderService
+from orders.services.pricing import quote_courses
+from orders.services.refund_service import reverse_orders
+from users.models import AccountBalance, BalanceTransaction, CustomUser, QueuedEmail
+from users.signals import SIGNUP_BONUS
+
+
+def run_in_parallel(func, arguments):
+    """
+    Call `func` once per argument, each in its own thread (and database connection),
+    releasing all threads at the same time.
+
+    Returns:
+        list: The return value or raised `ValueError` of each call.
+    """
+    barrier = threading.Barrier(len(arguments))
+    results = [None] * len(arguments)
+
+    def run(index, argument):
+        try:
+            barrier.wait()
+            results[index] = func(argument)
+        except ValueError as error:
+            results[index] = error
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(index, argument)) for index, argument in enumerate(arguments)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@mock.patch('orders.signals.drain_order_outbox.delay')
+class ConcurrentOrderTests(TransactionTestCase):
+    """
+        Stress tests for `OrderService.place_order` under parallel checkouts of the same
+        user, against a real database so the row locks and constraints are exercised.
+    """
+    PARALLEL_ORDERS = 20
+
+    def setUp(self):
+        clear_caches()
+        self.buyer = CustomUser.objects.create_user(username='buyer', email='buyer@example.com', password='password')
+        self.instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+
+    def create_course(self, title, price=Decimal('10.00')):
+        return Course.objects.create(title=title, description='Description', instructor=self.instructor, price=price)
+
+    def place_order(self, course_title):
+        return OrderService(self.buyer, course_title).place_order()
+
+    def assert_ledger_matches_balance(self, balance):
+        ledger_total = BalanceTransaction.objects.filter(account__user=self.buyer).aggregate(total=Sum('amount'))
+        self.assertEqual(ledger_total['total'], balance)
+
+    def test_parallel_orders_of_one_course_place_exactly_one(self, drain):
+        course = self.create_course('Concurrency')
+
+        results = run_in_parallel(self.place_order, [course.title] * self.PARALLEL_ORDERS)
+
+        self.assertEqual(sum(isinstance(result, Order) for result in results), 1)
+        self.assertTrue(all(
+            isinstance(result, Order) or "already ordered" in str(result) for result in results
+        ))
+        order = Order.objects.get(user=self.buyer, course=course)
+        balance = AccountBalance.objects.get(user=self.buyer).balance
+        self.assertEqual(balance, SIGNUP_BONUS - order.total_amount)
+        self.assertEqual(BalanceTransaction.objects.filter(kind='purchase', order=order).count(), 1)
+        self.assert_ledger_matches_balance(balance)
+
+    def test_parallel_orders_never_overdraw_the_balance(self, drain):
+        courses = [self.create_course(f'Course {index}') for index in range(self.PARALLEL_ORDERS)]
+
+        results = run_in_parallel(self.place_order, [course.title for course in courses])
+
+        orders = Order.objects.filter(user=self.buyer)
+        total_spent = sum((order.total_amount for order in orders), Decimal(0))
+        # With the default 5% tax each course costs 10.50, so the 50.00 bonus buys four.
+        self.assertEqual(orders.count(), 4)
+        self.assertEqual(sum(isinstance(result, Order) for result in results), 4)
+        balance = AccountBalance.objects.get(user=self.buyer).balance
+        self.assertEqual(balance, SIGNUP_BONUS - total_spent)
+        self.assertGreaterEqual(balance, 0)
+        self.assertEqual(BalanceTransaction.objects.filter(kind='purchase').count(), 4)
+        self.assert_ledger_matches_balance(balance)
+
+
+class OutboxDrainSchedulingTests(TestCase):
+    """
+        Checks that a broker outage while scheduling the outbox drain does not fail an order
+        that is already committed.
+    """
+    def test_broker_outage_leaves_event_pending(self):
+        buyer = CustomUser.objects.create_user(username='buyer', email='buyer@example.com', password='password')
+        instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        Course.objects.create(title='Outbox', description='Description', instructor=instructor, price=Decimal('10.00'))
+
+        with mock.patch('orders.signals.drain_order_outbox.delay', side_effect=ConnectionError) as drain:
+            drain.__qualname__ = 'drain_order_outbox.delay'
+            with self.captureOnCommitCallbacks(execute=True):
+                order = OrderService(buyer, 'Outbox').place_order()
+
+        drain.assert_called()
+        self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+        self.assertTrue(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+
+
+class IdempotencyLeaseTests(TestCase):
+    """
+        Checks that a key reserved by a request that never finished is taken over after
+        `IDEMPOTENCY_KEY_LEASE` instead of blocking retries for the whole window.
+    """
+    def setUp(self):
+        clear_caches()
+        self.user = CustomUser.objects.create_user(username='buyer', email='buyer@example.com', password='password')
+
+    def request(self):
+        return IdempotentRequest(self.user, 'retry-key', '/orders/', {'course_title': 'Concurrency'})
+
+    def test_in_progress_key_conflicts_within_lease(self):
+        self.assertTrue(self.request().reserve())
+
+        with self.assertRaises(IdempotencyConflict) as raised:
+            self.request().stored_response()
+        self.assertTrue(raised.exception.in_progress)
+
+    def test_abandoned_key_is_taken_over_after_lease(self):
+        abandoned = self.request()
+        self.assertTrue(abandoned.reserve())
+        IdempotencyKey.objects.update(created_at=timezone.now() - settings.IDEMPOTENCY_KEY_LEASE - timedelta(seconds=1))
+
+        retry = self.request()
+        self.assertIsNone(retry.stored_response())
+        self.assertTrue(retry.reserve())
+        retry.complete(201, {'id': 1})
+        # The original worker waking up late does not overwrite the retry's outcome.
+        abandoned.complete(201, {'id': 2})
+
+        self.assertEqual(self.request().stored_response(), (201, {'id': 1}))
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+
+class QuoteCacheTests(TestCase):
+    """
+        Checks that cached quotes follow coupon changes that do not touch `updated_at`.
+    """
+    def setUp(self):
+        clear_caches()
+        instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        self.course = Course.objects.create(
+            title='Pricing', description='Description', instructor=instructor, price=Decimal('100.00')
+        )
+        self.other_course = Course.objects.create(
+            title='Other', description='Description', instructor=instructor, price=Decimal('100.00')
+        )
+        self.coupon = Coupon.objects.create(
+            code='SAVE10', discount_percentage=Decimal('10'), creator=instructor,
+            valid_until=timezone.now() + timedelta(days=1),
+        )
+        self.coupon.courses.add(self.other_course)
+
+    def quote(self):
+        return quote_courses([self.course], coupon=resolve_coupon('SAVE10'))[self.course.id]
+
+    def test_quote_follows_applicable_courses(self):
+        self.assertFalse(self.quote().coupon_applied)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.coupon.courses.add(self.course)
+
+        quote = self.quote()
+        self.assertTrue(quote.coupon_applied)
+        self.assertEqual(quote.final_price, Decimal('90.00'))
+
+    def test_quote_follows_reverse_clear(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.coupon.courses.add(self.course)
+        self.assertTrue(self.quote().coupon_applied)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.applicable_coupons.clear()
+
+        self.assertFalse(self.quote().coupon_applied)
+
+    def test_quote_follows_queryset_updates(self):
+        self.coupon.courses.clear()
+        self.assertEqual(self.quote().final_price, Decimal('90.00'))
+
+        Coupon.objects.filter(pk=self.coupon.pk).update(discount_percentage=Decimal('20'))
+        invalidate_coupons(['SAVE10'])
+
+        self.assertEqual(self.quote().final_price, Decimal('80.00'))
+
+
+@mock.patch('users.utils.email.drain_email_queue.delay')
+class ReverseOrdersTests(TestCase):
+    """
+        Checks the balance credits and notification emails of batch cancellations and refunds.
+    """
+    def setUp(self):
+        clear_caches()
+        instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        self.course = Course.objects.create(
+            title='Refunds', description='Description', instructor=instructor, price=Decimal('10.00')
+        )
+        self.buyer = CustomUser.objects.create_user(username='buyer', email='buyer@example.com', password='password')
+        self.client = APIClient()
+
+    def create_order(self, status):
+        return Order.objects.create(
+            user=self.buyer, course=self.course, amount=Decimal('10.00'), tax_amount=Decimal('0.50'), status=status
+        )
+
+    def test_subject_follows_the_reversal(self, delay):
+        cancelled = self.create_order('created')
+        reverse_orders([cancelled.id], 'cancelled')
+        refunded = self.create_order('completed')
+        reverse_orders([refunded.id], 'refunded')
+
+        self.assertEqual(list(QueuedEmail.objects.order_by('id').values_list('subject', flat=True)),
+                         ['Order Cancelled', 'Order Refunded'])
+
+    def test_buyer_without_account_is_credited(self, delay):
+        AccountBalance.objects.filter(user=self.buyer).delete()
+        order = self.create_order('created')
+
+        reverse_orders([order.id], 'cancelled')
+
+        self.assertEqual(AccountBalance.objects.get(user=self.buyer).balance, order.total_amount)
+        self.assertEqual(BalanceTransaction.objects.get(order=order).amount, order.total_amount)
+
+    def test_refund_outside_window_is_rejected(self, delay):
+        order = self.create_order('completed')
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - settings.ORDER_REFUND_WINDOW - timedelta(minutes=1)
+        )
+        self.client.force_authenticate(self.buyer)
+
+        response = self.client.post(f'/orders/{order.id}/refund/')
+
+        self.assertEqual(response.status_code, 400)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'completed')
+        self.assertFalse(BalanceTransaction.objects.filter(order=order).exists())
+
+    def test_refund_within_window(self, delay):
+        order = self.create_order('completed')
+        self.client.force_authenticate(self.buyer)
+
+        response = self.client.post(f'/orders/{order.id}/refund/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'refunded')
+
+    def test_refund_only_decrements_windows_counting_the_enrollment(self, delay):
+        order = self.create_order('completed')
+        enrollment = Enrollment.objects.create(user=self.buyer, course=self.course)
+        Enrollment.objects.filter(pk=enrollment.pk).update(enrolled_at=timezone.now() - timedelta(days=10))
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='password')
+        Enrollment.objects.create(user=other, course=self.course)
+        for window, count in {'all': 2, '7d': 1, '30d': 2}.items():
+            CoursePopularity.objects.filter(course=self.course, window=window).update(enrollment_count=count)
+
+        reverse_orders([order.id], 'refunded')
+
+        counts = dict(CoursePopularity.objects.filter(course=self.course).values_list('window', 'enrollment_count'))
+        self.assertEqual(counts, {'all': 1, '7d': 1, '30d': 1})
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OrderViewSet, CouponViewSet
+from .views import OrderViewSet, CouponViewSet, QuoteView
 
 router = DefaultRouter()
 router.register(r'orders', OrderViewSet, basename='order')
 router.register("coupons", CouponViewSet, basename="coupon")
 
 urlpatterns = [
+    path("quotes/", QuoteView.as_view(), name="quotes"),
     path("", include(router.urls)),
 ]
@@ -1,14 +1,64 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from courses.models import Course
 from .models import Order, Coupon
 from rest_framework.response import Response
 from rest_framework import status
 
 from .permissions import IsCourseOwner
-from .serializers import OrderSerializer, CreateOrderSerializer, CouponCreateSerializer
+from .serializers import (
+    OrderSerializer, CreateOrderSerializer, CheckoutSerializer, CouponCreateSerializer, QuoteRequestSerializer,
+    QuoteSerializer,
+)
+from .services.checkout_service import CheckoutService
+from .services.coupon_cache import resolve_coupon
+from .services.idempotency import IDEMPOTENCY_HEADER, IdempotencyConflict, IdempotentRequest
 from .services.order_service import OrderService
-from .signals import order_success
-from .tasks import send_order_confirmation_email
+from .services.pricing import quote_courses
+from .services.refund_service import reverse_order
+
+
+def idempotent_response(request, handler):
+    """
+    Run `handler(request)` at most once per `Idempotency-Key` header value.
+
+    Requests without the header run normally. A retry with the same key and payload
+    replays the stored response (with an `Idempotent-Replayed: true` header) instead of
+    running the handler again; only successful responses are stored, so a failed
+    request can be retried with the same key.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return handler(request)
+    if len(key) > 255:
+        return Response({"error": f"{IDEMPOTENCY_HEADER} must be at most 255 characters."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    idempotent = IdempotentRequest(request.user, key, request.path, request.data)
+    try:
+        stored = idempotent.stored_response()
+        if stored is None and idempotent.reserve():
+            try:
+                response = handler(request)
+            except Exception:
+                idempotent.release()
+                raise
+            if status.is_success(response.status_code):
+                idempotent.complete(response.status_code, response.data)
+            else:
+                idempotent.release()
+            return response
+        stored = stored or idempotent.stored_response()
+    except IdempotencyConflict as e:
+        conflict_status = status.HTTP_409_CONFLICT if e.in_progress else status.HTTP_422_UNPROCESSABLE_ENTITY
+        return Response({"error": str(e)}, status=conflict_status)
+
+    response_status, body = stored
+    return Response(body, status=response_status, headers={'Idempotent-Replayed': 'true'})
 
 
 class OrderViewSet(ModelViewSet):
@@ -26,7 +76,12 @@ class OrderViewSet(ModelViewSet):
             - Uses `OrderSerializer` for other actions.
 
         - Filters orders to only include those created by the logged-in user.
-        - Automatically sends a confirmation email and signals order success on order creation.
+        - Enrollment and the confirmation email are handled asynchronously through the order outbox.
+        - Honors the `Idempotency-Key` header on creation, replaying the stored response for retries.
+        - `checkout` buys several courses in one transaction with a single balance debit and email.
+        - `cancel` (before enrollment) and `refund` (after) return the order total to the balance
+          and remove the enrollment. Buyers can only refund within `settings.ORDER_REFUND_WINDOW`
+          of the purchase; later refunds are left to admins (see the order admin actions).
     """
     permission_classes = [IsAuthenticated]
     queryset = Order.objects.all()
@@ -34,6 +89,8 @@ class OrderViewSet(ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return CreateOrderSerializer
+        if self.action == 'checkout':
+            return CheckoutSerializer
         return OrderSerializer
 
     def get_queryset(self):
@@ -44,22 +101,63 @@ class OrderViewSet(ModelViewSet):
         )
 
     def create(self, request, *args, **kwargs):
+        return idempotent_response(request, self.place_order)
+
+    def place_order(self, request):
         try:
             order_service = OrderService(
                 user=request.user,
                 course_title=request.data.get("course_title"),
                 coupon_code=request.data.get("coupon_code"),
+                region=request.data.get("region") or None,
             )
             order = order_service.place_order()
-            order_success.send(sender=Order, user=request.user, course=order.course)
-
-            send_order_confirmation_email.delay(order.id, request.user.email)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         response_serializer = OrderSerializer(order)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def checkout(self, request):
+        return idempotent_response(request, self.place_cart_orders)
+
+    def place_cart_orders(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            orders = CheckoutService(
+                user=request.user,
+                items=serializer.validated_data['items'],
+                region=serializer.validated_data.get('region') or None,
+            ).place_orders()
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_serializer = OrderSerializer(orders, many=True)
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        return self.transition(self.get_object(), 'cancelled')
+
+    @action(detail=True, methods=['post'])
+    def refund(self, request, pk=None):
+        order = self.get_object()
+        if order.created_at < timezone.now() - settings.ORDER_REFUND_WINDOW:
+            return Response(
+                {"error": f"Orders can only be refunded within {settings.ORDER_REFUND_WINDOW.days} days of purchase."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return self.transition(order, 'refunded')
+
+    def transition(self, order, target_status):
+        try:
+            order = reverse_order(order, target_status)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
+
 
 class CouponViewSet(ModelViewSet):
     """
@@ -77,3 +175,35 @@ class CouponViewSet(ModelViewSet):
 
     def get_queryset(self):
         return Coupon.objects.filter(creator=self.request.user).prefetch_related('courses')
+
+
+class QuoteView(APIView):
+    """
+    Prices a batch of courses in one request, e.g. for a catalog page.
+
+    Query Parameters:
+        - `course_ids` (required): Comma-separated course IDs.
+        - `coupon_code` (optional): A discount code, applied to the courses it is eligible for.
+        - `region` (optional): Region code selecting the tax rate.
+
+    Quotes come from the same pricing engine as order placement, so the listed price is
+    the price charged at checkout. Unknown course IDs are left out of the response.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        serializer = QuoteRequestSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        coupon = None
+        coupon_code = serializer.validated_data.get('coupon_code')
+        if coupon_code:
+            coupon = resolve_coupon(coupon_code)
+            if coupon is None:
+                return Response({"error": "Invalid or expired coupon code."}, status=status.HTTP_400_BAD_REQUEST)
+
+        course_ids = serializer.validated_data['course_ids']
+        courses = Course.objects.filter(id__in=course_ids).only('id', 'price')
+        quotes = quote_courses(courses, coupon=coupon, region=serializer.validated_data.get('region') or None)
+        ordered = [quotes[course_id] for course_id in course_ids if course_id in quotes]
+        return Response(QuoteSerializer(ordered, many=True).data)
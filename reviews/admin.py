@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.db import transaction
+
+from courses.services.rating_aggregates import record_review_created, record_review_updated, record_review_deleted
 from reviews.models import Review
 
 @admin.register(Review)
@@ -8,3 +11,24 @@ class ReviewAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'course__title', 'comment')
     ordering = ('created_at',)
     list_editable = ('rating',)
+
+    def save_model(self, request, obj, form, change):
+        previous_rating = form.initial.get('rating') if change else None
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if change:
+                record_review_updated(obj, previous_rating)
+            else:
+                record_review_created(obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            record_review_deleted(obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            reviews = list(queryset)
+            super().delete_queryset(request, queryset)
+            for review in reviews:
+                record_review_deleted(review)
@@ -10,9 +10,14 @@ class Review(models.Model):
     rating = models.IntegerField(choices=[(1, '1 Star'), (2, '2 Stars'), (3, '3 Stars'), (4, '4 Stars'), (5, '5 Stars')])
     comment = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Latest change, used to build the HTTP validators of review endpoints.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('user', 'course')
+        indexes = [
+            models.Index(fields=['course', 'updated_at'], name='review_course_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Review of {self.course.title} by {self.user.username}"
@@ -1,3 +1,60 @@
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from courses.models import Course
+from courses.services.rating_aggregates import rebuild_rating_aggregates
+from reviews.models import Review
+from reviews.views import ReviewViewSet
+from users.models import CustomUser
+
+RATING_FIELDS = ['rating_count', 'rating_sum', 'rating_average'] + [f'rating_{star}_count' for star in range(1, 6)]
+
+
+class ReviewRatingAggregateTests(TestCase):
+    """
+        Checks that the running rating aggregates of a course match a full rebuild after
+        review writes, including an edit made from a stale copy of the review.
+    """
+    def setUp(self):
+        instructor = CustomUser.objects.create_user(
+            username='instructor', email='instructor@example.com', password='password', role='instructor'
+        )
+        self.course = Course.objects.create(title='Reviewed', description='Description', instructor=instructor,
+                                            price='10.00')
+        self.student = CustomUser.objects.create_user(username='student', email='student@example.com',
+                                                      password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        response = self.client.post(f'/courses/{self.course.id}/reviews/', {'rating': 2, 'comment': 'Meh'})
+        self.assertEqual(response.status_code, 201)
+        self.review = Review.objects.get(pk=response.data['id'])
+
+    def aggregates(self):
+        return Course.objects.filter(pk=self.course.pk).values(*RATING_FIELDS).get()
+
+    def assert_aggregates_match_rebuild(self):
+        running = self.aggregates()
+        rebuild_rating_aggregates(Course.objects.filter(pk=self.course.pk))
+        self.assertEqual(running, self.aggregates())
+
+    def update(self, rating):
+        response = self.client.patch(f'/courses/{self.course.id}/reviews/{self.review.id}/', {'rating': rating})
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_matches_rebuild(self):
+        self.update(4)
+
+        self.assertEqual(self.aggregates()['rating_sum'], 4)
+        self.assert_aggregates_match_rebuild()
+
+    def test_update_from_stale_instance_matches_rebuild(self):
+        stale = Review.objects.get(pk=self.review.pk)
+        self.update(4)
+
+        with mock.patch.object(ReviewViewSet, 'get_object', return_value=stale):
+            self.update(5)
 
-# Create your tests here.
+        self.assertEqual(self.aggregates()['rating_sum'], 5)
+        self.assert_aggregates_match_rebuild()
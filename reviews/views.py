@@ -1,10 +1,13 @@
+from django.db import transaction
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from .models import Review, Course
 from .permissions import IsReviewOwner
 from .serializers import ReviewSerializer
+from courses.services.rating_aggregates import record_review_created, record_review_updated, record_review_deleted
+from edunexus.conditional import ConditionalGetMixin
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
         A viewset for managing course reviews.
 
@@ -14,6 +17,9 @@ class ReviewViewSet(viewsets.ModelViewSet):
               primary key (`course_pk`) provided in the URL.
             - Ensures only authenticated users can create/update reviews
               and only review owners can modify or delete their reviews.
+            - `list` and `retrieve` carry an ETag built from the review count and latest
+              `updated_at` of the course, answering conditional
+              requests with a 304. Shared caches must revalidate before every reuse.
 
         Permissions:
             - `IsAuthenticatedOrReadOnly`: Allows authenticated users
@@ -25,10 +31,16 @@ class ReviewViewSet(viewsets.ModelViewSet):
                course based on `course_pk` provided in the URL.
             - `perform_create`: Handles review creation, linking it to
                the course and the user who created the review.
+            - `perform_update` / `perform_destroy`: Keep the course rating
+               aggregates in sync within the same transaction as the review write.
     """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsReviewOwner]
+    cache_control = {
+        'list': 'public, no-cache',
+        'retrieve': 'public, no-cache',
+    }
 
     def get_queryset(self):
         course_id = self.kwargs.get('course_pk')
@@ -41,4 +53,21 @@ class ReviewViewSet(viewsets.ModelViewSet):
         if not course_id:
             raise KeyError("course_pk is required in the URL for creating a review.")
         course = Course.objects.get(pk=course_id)
-        serializer.save(course=course, user=self.request.user)
+        with transaction.atomic():
+            review = serializer.save(course=course, user=self.request.user)
+            record_review_created(review)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Read the previous rating from the locked row: the instance loaded by the view
+            # may be stale if the review is edited concurrently.
+            previous_rating = Review.objects.select_for_update().values_list('rating', flat=True).get(
+                pk=serializer.instance.pk
+            )
+            review = serializer.save()
+            record_review_updated(review, previous_rating)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            record_review_deleted(instance)
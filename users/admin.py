@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser, AccountBalance
+from .models import CustomUser, AccountBalance, BalanceTransaction, QueuedEmail
 
 @admin.register(CustomUser)
 class CustomUserAdmin(admin.ModelAdmin):
@@ -11,6 +11,27 @@ class CustomUserAdmin(admin.ModelAdmin):
 
 @admin.register(AccountBalance)
 class AccountBalanceAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'balance')
+    list_display = ('id', 'user', 'balance', 'checkpointed_at')
     search_fields = ('user__username',)
     ordering = ('balance',)
+    readonly_fields = ('balance', 'checkpoint_balance', 'checkpoint_transaction_id', 'checkpointed_at')
+
+@admin.register(BalanceTransaction)
+class BalanceTransactionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'account', 'kind', 'amount', 'order', 'created_at')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('account__user__username',)
+    ordering = ('-id',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'priority', 'attempts', 'available_at', 'sent_at')
+    list_filter = ('status', 'priority', 'created_at')
+    search_fields = ('subject', 'recipients')
+    ordering = ('-created_at',)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from users.utils.ledger import checkpoint_balances, open_ledgers, reconcile_balances
+
+
+class Command(BaseCommand):
+    help = "Check every account balance against its ledger, optionally opening ledgers and checkpointing first."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--open', action='store_true',
+                            help="Record the balance that predates the ledger as an opening entry.")
+        parser.add_argument('--checkpoint', action='store_true', help="Checkpoint settled ledger rows first.")
+
+    def handle(self, *args, **options):
+        if options['open']:
+            self.stdout.write(f"Opened {open_ledgers()} ledgers")
+        if options['checkpoint']:
+            self.stdout.write(f"Checkpointed {checkpoint_balances()} accounts")
+
+        mismatched = list(reconcile_balances().select_related('user'))
+        for account in mismatched:
+            self.stdout.write(self.style.ERROR(
+                f"{account.user.username}: balance {account.balance}, ledger {account.ledger_balance}"
+            ))
+        if mismatched:
+            self.stdout.write(self.style.ERROR(f"{len(mismatched)} balances do not match their ledger."))
+        else:
+            self.stdout.write(self.style.SUCCESS("All balances match their ledger."))
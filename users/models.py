@@ -1,5 +1,10 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = [
@@ -13,6 +18,11 @@ class CustomUser(AbstractUser):
     profile_picture = models.ImageField(upload_to="profiles/", blank=True, null=True)
     is_verified = models.BooleanField(default=False)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(fields=['username'], name='user_username_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -26,19 +36,169 @@ class CustomUser(AbstractUser):
 
 
 class AccountBalance(models.Model):
+    """
+    Current balance of a user, maintained from the append-only `BalanceTransaction` ledger.
+
+    Every change goes through `apply_transactions`, which moves `balance` with one atomic
+    `F()` update and appends the matching ledger rows in the same transaction, so reading
+    the balance is O(1). `checkpoint_balance` is the ledger total up to
+    `checkpoint_transaction_id`, which keeps reconciliation to the rows written since.
+    """
     user = models.OneToOneField('CustomUser', on_delete=models.CASCADE, related_name="balance")
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    checkpoint_balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    checkpoint_transaction_id = models.BigIntegerField(default=0)
+    checkpointed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.user.username} Balance: ${self.balance}"
 
-    def add_balance(self, amount):
-        self.balance += amount
-        self.save()
+    def apply_transactions(self, entries):
+        """
+        Apply ledger entries to the balance atomically.
+
+        Args:
+            entries (list): `(kind, amount, order)` tuples; `amount` is positive for credits
+                and negative for debits, `order` may be None.
+
+        Raises:
+            ValueError: If the entries would make the balance negative.
+
+        Returns:
+            list: The created `BalanceTransaction` objects.
+        """
+        total = sum((Decimal(amount) for _, amount, _ in entries), Decimal(0))
+        with transaction.atomic():
+            # The balance check and the change are one conditional UPDATE, so concurrent
+            # debits cannot overdraw and no update is lost.
+            updated = AccountBalance.objects.filter(pk=self.pk, balance__gte=-total).update(
+                balance=F('balance') + total
+            )
+            if not updated:
+                raise ValueError("Insufficient balance")
+            transactions = BalanceTransaction.objects.bulk_create([
+                BalanceTransaction(account=self, kind=kind, amount=amount, order=order)
+                for kind, amount, order in entries
+            ])
+        self.refresh_from_db(fields=['balance'])
+        return transactions
+
+    @classmethod
+    def credit_accounts(cls, entries):
+        """
+        Credit many users' balances at once, e.g. for a mass refund.
+
+        All balances are moved by a single `UPDATE ... CASE` statement and the ledger rows
+        are appended with one insert. Users without an account get one, starting at zero.
+        Must run inside a transaction.
+
+        Args:
+            entries (list): `(user_id, kind, amount, order)` tuples with positive amounts.
+
+        Returns:
+            list: The created `BalanceTransaction` objects.
+        """
+        user_ids = {user_id for user_id, _, _, _ in entries}
+        accounts = dict(cls.objects.filter(user_id__in=user_ids).values_list('user_id', 'id'))
+        missing = user_ids - accounts.keys()
+        if missing:
+            cls.objects.bulk_create([cls(user_id=user_id) for user_id in missing], ignore_conflicts=True)
+            accounts.update(cls.objects.filter(user_id__in=missing).values_list('user_id', 'id'))
+        totals = {}
+        for user_id, _, amount, _ in entries:
+            totals[accounts[user_id]] = totals.get(accounts[user_id], Decimal(0)) + Decimal(amount)
+        if not totals:
+            return []
+
+        cls.objects.filter(pk__in=totals).update(balance=F('balance') + Case(
+            *[When(pk=account_id, then=Value(total)) for account_id, total in totals.items()],
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ))
+        return BalanceTransaction.objects.bulk_create([
+            BalanceTransaction(account_id=accounts[user_id], kind=kind, amount=amount, order=order)
+            for user_id, kind, amount, order in entries
+        ])
+
+    def add_balance(self, amount, kind='top_up', order=None):
+        return self.apply_transactions([(kind, amount, order)])[0]
+
+    def subtract_balance(self, amount, kind='purchase', order=None):
+        return self.apply_transactions([(kind, -amount, order)])[0]
+
+
+class BalanceTransaction(models.Model):
+    """
+    Append-only ledger entry of an `AccountBalance`.
 
-    def subtract_balance(self, amount):
-        if self.balance >= amount:
-            self.balance -= amount
-            self.save()
-        else:
-            raise ValueError("Insufficient balance")
+    `amount` is signed: credits (top-ups, refunds, bonuses) are positive and purchases are
+    negative. Entries are never updated or deleted; a correction is a new entry. An
+    `opening` entry records the part of a balance that predates the ledger.
+    """
+    KIND_CHOICES = [
+        ('top_up', 'Top-up'),
+        ('purchase', 'Purchase'),
+        ('refund', 'Refund'),
+        ('bonus', 'Bonus'),
+        ('opening', 'Opening balance'),
+    ]
+
+    account = models.ForeignKey('AccountBalance', on_delete=models.CASCADE, related_name="transactions")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    order = models.ForeignKey('orders.Order', on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name="balance_transactions")
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'id'], name='balance_tx_account_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount} ({self.account_id})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Balance transactions are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Balance transactions are append-only.")
+
+
+class QueuedEmail(models.Model):
+    """
+    Email waiting to be sent by the mail queue (see `users.tasks.drain_email_queue`).
+
+    Higher `priority` messages are sent first; a failed message is retried from
+    `available_at` on until it runs out of attempts.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    PRIORITY_BULK = 0
+    PRIORITY_TRANSACTIONAL = 10
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    recipients = models.JSONField()
+    priority = models.SmallIntegerField(default=PRIORITY_BULK)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-priority', 'available_at', 'id'], name='queued_email_pending_idx',
+                         condition=models.Q(status='pending')),
+            models.Index(fields=['status', 'sent_at'], name='queued_email_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
@@ -4,7 +4,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 
-from .models import CustomUser
+from .models import BalanceTransaction, CustomUser
 
 User = get_user_model()
 
@@ -79,9 +79,21 @@ class BalanceSerializer(serializers.Serializer):
     """
         Serializer for displaying the user's current balance.
 
-        Provides the `balance` as a floating-point value.
+        Provides the `balance` as an exact decimal value.
     """
-    balance = serializers.FloatField()
+    balance = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+
+class BalanceTransactionSerializer(serializers.ModelSerializer):
+    """
+        Serializer for the entries of the user's balance ledger.
+
+        `amount` is positive for credits and negative for purchases.
+    """
+    class Meta:
+        model = BalanceTransaction
+        fields = ['id', 'kind', 'amount', 'order', 'created_at']
+        read_only_fields = fields
 
 
 class AddBalanceSerializer(serializers.Serializer):
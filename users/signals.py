@@ -2,12 +2,15 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import CustomUser, AccountBalance
 
+SIGNUP_BONUS = 50
+
 @receiver(post_save, sender=CustomUser)
 def create_account_balance(sender, instance, created, **kwargs):
     """
         Signal triggered upon user creation.
 
-        Automatically creates an initial account balance for new users with a default value of 50 as a bonus.
+        Automatically creates an initial account balance for new users, crediting a signup bonus
+        of `SIGNUP_BONUS` through the balance ledger.
 
         Args:
             sender: The model class (CustomUser).
@@ -15,5 +18,5 @@ def create_account_balance(sender, instance, created, **kwargs):
             created: A boolean indicating whether the user was newly created.
     """
     if created:
-        account_balance = AccountBalance.objects.create(user=instance, balance=50)
-        account_balance.save()
+        account_balance = AccountBalance.objects.create(user=instance)
+        account_balance.add_balance(SIGNUP_BONUS, kind='bonus')
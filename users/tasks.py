@@ -0,0 +1,176 @@
+import time
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import QueuedEmail
+from users.utils.ledger import checkpoint_balances, reconcile_balances
+
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def _reserve_send_slots(count):
+    """
+    Reserve up to `count` sends in the current one-minute rate limit window.
+
+    The window counter lives in the shared `rate_limits` cache, so the limit holds across workers.
+
+    Returns:
+        tuple: The window's cache key and the number of sends granted (0 when the window is used up).
+    """
+    rate_limits = caches['rate_limits']
+    key = f"mail_queue:sent:{int(time.time() // 60)}"
+    rate_limits.add(key, 0, timeout=120)
+    try:
+        total = rate_limits.incr(key, count)
+    except ValueError:
+        # The counter expired between `add` and `incr`.
+        rate_limits.set(key, count, timeout=120)
+        total = count
+
+    granted = max(0, min(count, settings.EMAIL_QUEUE_RATE_LIMIT - (total - count)))
+    if granted < count:
+        _release_send_slots(key, count - granted)
+    return key, granted
+
+
+def _release_send_slots(key, count):
+    try:
+        caches['rate_limits'].decr(key, count)
+    except ValueError:
+        pass
+
+
+def _retry_delay(attempts):
+    return min(timedelta(seconds=30 * 2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+
+def _record_failure(email, error, now):
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.available_at = now + _retry_delay(email.attempts)
+
+
+def _send_batch(limit):
+    """
+    Claim and send up to `limit` pending emails over a single SMTP connection.
+
+    Rows are claimed with `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent workers never
+    send the same email. Each message is handed to `send_messages` on its own, so one
+    rejected recipient does not fail the rest of the batch. If the connection cannot be
+    opened, the attempt counts as failed for every claimed email, which is retried with
+    the same backoff.
+
+    Returns:
+        tuple: The number of emails sent and the number claimed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=now)
+            .order_by('-priority', 'available_at', 'id')[:limit]
+        )
+        if not emails:
+            return 0, 0
+
+        for email in emails:
+            email.attempts += 1
+        sent = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            for email in emails:
+                _record_failure(email, e, now)
+        else:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email or None, email.recipients, connection=connection
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    _record_failure(email, e, now)
+                else:
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+            try:
+                connection.close()
+            except Exception:
+                # The messages are already handed over; a failed QUIT does not undo them.
+                pass
+
+        QueuedEmail.objects.bulk_update(emails, ['status', 'attempts', 'last_error', 'available_at', 'sent_at'])
+    return sent, len(emails)
+
+
+@shared_task
+def drain_email_queue():
+    """
+    Task to send queued emails in batches until the queue is empty or the rate limit
+    window (`settings.EMAIL_QUEUE_RATE_LIMIT` emails per minute) is used up.
+
+    Returns:
+        str: Status message indicating the number of sent emails.
+    """
+    total = 0
+    while True:
+        window_key, granted = _reserve_send_slots(settings.EMAIL_QUEUE_BATCH_SIZE)
+        if not granted:
+            break
+        sent, claimed = _send_batch(granted)
+        if claimed < granted:
+            _release_send_slots(window_key, granted - claimed)
+        total += sent
+        if claimed < granted:
+            break
+    return f"Sent {total} queued emails."
+
+
+@shared_task
+def purge_sent_emails():
+    """
+    Task to delete sent emails older than `settings.EMAIL_QUEUE_RETENTION`.
+
+    Returns:
+        str: Status message indicating the number of deleted emails.
+    """
+    deleted, _ = QueuedEmail.objects.filter(
+        status='sent', sent_at__lt=timezone.now() - settings.EMAIL_QUEUE_RETENTION
+    ).delete()
+    return f"Purged {deleted} sent emails."
+
+
+@shared_task
+def checkpoint_account_balances():
+    """
+    Task to fold settled balance ledger rows into the account checkpoints.
+
+    Returns:
+        str: Status message indicating the number of checkpointed accounts.
+    """
+    return f"Checkpointed {checkpoint_balances()} account balances."
+
+
+@shared_task
+def reconcile_account_balances():
+    """
+    Task to check every account balance against its ledger.
+
+    Returns:
+        str: Status message listing the IDs of mismatched accounts, if any.
+    """
+    mismatched = list(reconcile_balances().values_list('id', flat=True))
+    if mismatched:
+        return f"{len(mismatched)} balances do not match their ledger: {mismatched}"
+    return "All balances match their ledger."
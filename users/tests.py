@@ -1,3 +1,151 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from edunexus.testing import clear_caches
+from users import tasks
+from users.models import AccountBalance, BalanceTransaction, CustomUser, QueuedEmail
+from users.tasks import MAX_RETRY_DELAY, drain_email_queue
+from users.utils.email import queue_emails
+from users.utils.ledger import CHECKPOINT_SETTLE_TIME, checkpoint_balances, open_ledgers, reconcile_balances
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_QUEUE_BATCH_SIZE=2,
+    EMAIL_QUEUE_RATE_LIMIT=3,
+    EMAIL_QUEUE_MAX_ATTEMPTS=2,
+)
+@mock.patch('users.utils.email.drain_email_queue.delay')
+class EmailQueueTests(TestCase):
+    """
+        Drains the mail queue into the locmem backend (`django.core.mail.outbox`) to check
+        batching, priorities, the per-minute rate limit and retries with backoff.
+    """
+    BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+    def setUp(self):
+        clear_caches()
+        # Keep every drain of a test in the same rate limit window.
+        patcher = mock.patch('users.tasks.time')
+        patcher.start().time.return_value = 600.0
+        self.addCleanup(patcher.stop)
+
+    def queue(self, count):
+        return queue_emails([(f'Subject {index}', 'Body', [f'user{index}@example.com']) for index in range(count)])
+
+    def make_available(self):
+        QueuedEmail.objects.filter(status='pending').update(available_at=timezone.now())
+
+    def test_drain_sends_in_batches_by_priority(self, delay):
+        self.queue(2)
+        queue_emails([('Verify', 'Body', ['new@example.com'])], priority=QueuedEmail.PRIORITY_TRANSACTIONAL)
+
+        with mock.patch('users.tasks._send_batch', wraps=tasks._send_batch) as send_batch:
+            drain_email_queue()
+
+        self.assertEqual([call.args for call in send_batch.call_args_list], [(2,), (1,)])
+        self.assertEqual([message.subject for message in mail.outbox], ['Verify', 'Subject 0', 'Subject 1'])
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertEqual(QueuedEmail.objects.filter(status='sent').count(), 3)
+
+    def test_drain_stops_at_rate_limit(self, delay):
+        self.queue(5)
+
+        drain_email_queue()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(QueuedEmail.objects.filter(status='pending').count(), 2)
+
+        # The window is used up until the next minute.
+        drain_email_queue()
+        self.assertEqual(len(mail.outbox), 3)
+
+        with mock.patch('users.tasks.time') as next_minute:
+            next_minute.time.return_value = 660.0
+            drain_email_queue()
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failed_send_is_retried_with_backoff(self, delay):
+        email, = self.queue(1)
+
+        with mock.patch(f'{self.BACKEND}.send_messages', side_effect=SMTPException('busy')):
+            drain_email_queue()
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, 'busy'))
+        self.assertGreater(email.available_at, timezone.now())
+        self.assertLessEqual(email.available_at, timezone.now() + MAX_RETRY_DELAY)
+
+        # Not due yet: the next drain leaves it alone.
+        drain_email_queue()
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+
+        self.make_available()
+        drain_email_queue()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), ('sent', 2, ''))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_email_fails_after_max_attempts(self, delay):
+        email, = self.queue(1)
+
+        with mock.patch(f'{self.BACKEND}.send_messages', side_effect=SMTPException('rejected')):
+            drain_email_queue()
+            self.make_available()
+            drain_email_queue()
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 2))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_connection_failure_counts_as_failed_attempt(self, delay):
+        emails = self.queue(2)
+
+        with mock.patch(f'{self.BACKEND}.open', side_effect=OSError('refused')):
+            drain_email_queue()
+
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, 'refused'))
+            self.assertGreater(email.available_at, timezone.now())
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class OpenLedgerTests(TestCase):
+    """
+        Checks that `open_ledgers` reconciles accounts whose balance predates the ledger,
+        even when they transacted or were checkpointed before it ran.
+    """
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='legacy', email='legacy@example.com', password='password')
+        self.account = self.user.balance
+        # Simulate money held before the ledger existed.
+        AccountBalance.objects.filter(pk=self.account.pk).update(balance=F('balance') + Decimal('30.00'))
+        self.account.refresh_from_db()
+
+    def test_open_after_transactions_and_checkpoint(self):
+        self.account.add_balance(Decimal('20.00'))
+        BalanceTransaction.objects.update(created_at=timezone.now() - CHECKPOINT_SETTLE_TIME - timedelta(minutes=1))
+        checkpoint_balances()
+        self.assertEqual(list(reconcile_balances()), [self.account])
+
+        self.assertEqual(open_ledgers(), 1)
+
+        self.assertFalse(reconcile_balances().exists())
+        self.assertEqual(BalanceTransaction.objects.get(kind='opening').amount, Decimal('30.00'))
+        # Reconciled accounts are not opened twice.
+        self.assertEqual(open_ledgers(), 0)
+
+    def test_accounts_covered_by_their_ledger_are_left_alone(self):
+        other = CustomUser.objects.create_user(username='new', email='new@example.com', password='password')
+
+        self.assertEqual(open_ledgers(), 1)
+
+        self.assertFalse(BalanceTransaction.objects.filter(account=other.balance, kind='opening').exists())
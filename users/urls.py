@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import LoginUserView, RegisterUserView, ProfileUserView, VerifyEmailCodeView, AddBalanceView, \
-    GetBalanceView, PasswordResetRequestView, PasswordResetConfirmView
+    GetBalanceView, PasswordResetRequestView, PasswordResetConfirmView, BalanceTransactionListView
 
 
 urlpatterns = [
@@ -12,4 +12,5 @@ urlpatterns = [
     path('profile/', ProfileUserView.as_view(), name='profile'),
     path('balance/', GetBalanceView.as_view(), name='get-balance'),
     path('balance/add/', AddBalanceView.as_view(), name='balance'),
+    path('balance/transactions/', BalanceTransactionListView.as_view(), name='balance-transactions'),
 ]
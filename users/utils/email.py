@@ -1,11 +1,52 @@
 import os
 
-from django.core.mail import send_mail
+from django.db import transaction
+
+from users.models import QueuedEmail
+from users.tasks import drain_email_queue
+
+
+def queue_emails(messages, priority=QueuedEmail.PRIORITY_BULK):
+    """
+    Queue emails for the mail workers instead of sending them in the caller.
+
+    The messages are written with one insert, inside the caller's transaction if there is
+    one, and a drain is scheduled once it commits. A broker outage is logged rather than
+    raised to the caller, whose transaction has already committed; the periodic drain then
+    sends the messages.
+
+    Args:
+        messages (Iterable[tuple]): `(subject, message, recipient_list)` tuples.
+        priority (int): `QueuedEmail.PRIORITY_*`; transactional mail is sent before bulk mail.
+
+    Returns:
+        list: The queued `QueuedEmail` objects.
+    """
+    queued = QueuedEmail.objects.bulk_create([
+        QueuedEmail(
+            subject=subject,
+            body=message,
+            from_email=os.getenv('EMAIL_HOST_USER') or '',
+            recipients=list(recipient_list),
+            priority=priority,
+        )
+        for subject, message, recipient_list in messages
+    ])
+    if queued:
+        transaction.on_commit(drain_email_queue.delay, robust=True)
+    return queued
+
+
+def queue_email(subject, message, recipient_list, priority=QueuedEmail.PRIORITY_BULK):
+    """
+    Queue a single email, see `queue_emails`.
+    """
+    return queue_emails([(subject, message, recipient_list)], priority=priority)[0]
 
 
 def send_verification_email(email, code):
     """
-    Send a verification email containing a 6-digit code.
+    Queue a verification email containing a 6-digit code.
 
     Args:
         email (str): The recipient's email address.
@@ -13,30 +54,24 @@ def send_verification_email(email, code):
     """
     subject = "Your Verification Code"
     message = f"Your verification code is {code}. It will expire in 10 minutes."
-    sender_email = os.getenv('EMAIL_HOST_USER')
-    recipient_email = [email]
-
-    send_mail(subject, message, sender_email, recipient_email)
+    queue_email(subject, message, [email], priority=QueuedEmail.PRIORITY_TRANSACTIONAL)
 
 
 def send_success_email(email):
     """
-        Send an email to notify the user that their email verification was successful.
+        Queue an email to notify the user that their email verification was successful.
 
         Args:
             email (str): The recipient's email address.
     """
     subject = "Your Email is Verified!"
     message = "Thank you for verifying your email. You can now access your account."
-    sender_email = os.getenv('EMAIL_HOST_USER')
-    recipient_list = [email]
-
-    send_mail(subject, message, sender_email, recipient_list)
+    queue_email(subject, message, [email], priority=QueuedEmail.PRIORITY_TRANSACTIONAL)
 
 
 def send_password_reset_email(email, token):
     """
-    Send an email containing a password reset token to the user.
+    Queue an email containing a password reset token to the user.
 
     Args:
         email (str): The recipient's email address.
@@ -51,17 +86,12 @@ def send_password_reset_email(email, token):
         f"Thanks,\nEduNexus"
     )
 
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=os.getenv('EMAIL_HOST_USER'),
-        recipient_list=[email],
-    )
+    queue_email(subject, message, [email], priority=QueuedEmail.PRIORITY_TRANSACTIONAL)
 
 
 def send_password_reset_success_email(email):
     """
-    Send an email notifying the user that their password has been successfully reset.
+    Queue an email notifying the user that their password has been successfully reset.
 
     Args:
         email (str): The recipient's email address.
@@ -73,7 +103,4 @@ def send_password_reset_success_email(email):
         "If you did not request this change, please contact support immediately.\n\n"
         "Thank you,\nEduNexus"
     )
-    sender_email = os.getenv('EMAIL_HOST_USER')
-    recipient_list = [email]
-
-    send_mail(subject, message, sender_email, recipient_list)
+    queue_email(subject, message, [email], priority=QueuedEmail.PRIORITY_TRANSACTIONAL)
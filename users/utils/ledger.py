@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import DecimalField, Exists, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from users.models import AccountBalance, BalanceTransaction
+
+# Ledger rows younger than this are left out of a checkpoint, so a transaction that
+# allocated a lower ID but committed later is never skipped.
+CHECKPOINT_SETTLE_TIME = timedelta(minutes=5)
+
+
+def checkpoint_balances():
+    """
+    Fold settled ledger rows into each account's checkpoint with one `UPDATE`.
+
+    Returns:
+        int: The number of accounts checkpointed.
+    """
+    now = timezone.now()
+    pending = BalanceTransaction.objects.filter(
+        account=OuterRef('pk'),
+        id__gt=OuterRef('checkpoint_transaction_id'),
+        created_at__lt=now - CHECKPOINT_SETTLE_TIME,
+    ).order_by().values('account')
+
+    return AccountBalance.objects.filter(Exists(pending)).update(
+        checkpoint_balance=F('checkpoint_balance') + Subquery(pending.annotate(total=Sum('amount')).values('total')),
+        checkpoint_transaction_id=Subquery(pending.annotate(last_id=Max('id')).values('last_id')),
+        checkpointed_at=now,
+    )
+
+
+def reconcile_balances():
+    """
+    Find accounts whose balance does not match their ledger, with one aggregate query.
+
+    The expected balance is the checkpoint plus every ledger row written after it.
+
+    Returns:
+        QuerySet: The mismatched accounts, annotated with `ledger_balance`.
+    """
+    since_checkpoint = Coalesce(
+        Sum('transactions__amount', filter=Q(transactions__id__gt=F('checkpoint_transaction_id'))),
+        Value(0),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    return AccountBalance.objects.annotate(
+        ledger_balance=F('checkpoint_balance') + since_checkpoint
+    ).exclude(balance=F('ledger_balance'))
+
+
+def open_ledgers():
+    """
+    Start the ledger of accounts created before it existed, so they reconcile.
+
+    Each account whose balance is not covered by its ledger, and that has no opening
+    entry yet, gets an `opening` entry for the difference. This holds whether or not the
+    account transacted or was checkpointed since the upgrade. The accounts are locked
+    while they are read, so no balance change can slip in between the balance and its
+    ledger total.
+
+    Returns:
+        int: The number of accounts initialized.
+    """
+    ledger_total = Coalesce(
+        Sum('transactions__amount'), Value(0), output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+    with transaction.atomic():
+        accounts = list(
+            AccountBalance.objects.select_for_update()
+            .filter(~Exists(BalanceTransaction.objects.filter(account=OuterRef('pk'), kind='opening')))
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        gaps = (
+            AccountBalance.objects.filter(pk__in=accounts)
+            .annotate(opening=F('balance') - ledger_total)
+            .exclude(opening=0)
+            .values_list('pk', 'opening')
+        )
+        opened = BalanceTransaction.objects.bulk_create([
+            BalanceTransaction(account_id=account_id, kind='opening', amount=opening)
+            for account_id, opening in gaps
+        ])
+    return len(opened)
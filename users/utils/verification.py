@@ -1,12 +1,12 @@
 import random
-from django.core.cache import cache
+from django.core.cache import caches
 
 
 def generate_verification_code(user_id):
     """
     Generate a 6-digit verification code and cache it for a user.
 
-    The code is stored in the cache for 10 minutes along with
+    The code is stored in the shared `auth_codes` cache for 10 minutes along with
     the user's associated ID for verification purposes.
 
     Args:
@@ -17,9 +17,9 @@ def generate_verification_code(user_id):
     """
     code = f"{random.randint(100000, 999999)}"
     cache_key = f"verification_code_{user_id}"
-    cache.set(cache_key, code, timeout=600)
+    caches['auth_codes'].set(cache_key, code, timeout=600)
 
     code_key = f"user_id_for_code_{code}"
-    cache.set(code_key, user_id, timeout=600)
+    caches['auth_codes'].set(code_key, user_id, timeout=600)
 
     return code
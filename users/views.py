@@ -1,16 +1,18 @@
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from django.core.cache import caches
 from rest_framework import status
-from rest_framework.generics import GenericAPIView, RetrieveUpdateAPIView
+from rest_framework.generics import GenericAPIView, ListAPIView, RetrieveUpdateAPIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from users.models import BalanceTransaction
 from users.utils.verification import generate_verification_code
 
 from users.serializers import UserRegistrationSerializer, UserProfileSerializer, CustomTokenObtainPairSerializer, \
-    VerifyEmailCodeSerializer, AddBalanceSerializer, BalanceSerializer, PasswordResetConfirmSerializer, PasswordResetRequestSerializer
+    VerifyEmailCodeSerializer, AddBalanceSerializer, BalanceSerializer, PasswordResetConfirmSerializer, PasswordResetRequestSerializer, \
+    BalanceTransactionSerializer
 from users.utils.email import send_verification_email, send_success_email, send_password_reset_email, send_password_reset_success_email
 
 User = get_user_model()
@@ -68,7 +70,8 @@ class VerifyEmailCodeView(GenericAPIView):
         code = serializer.validated_data["code"]
 
         code_key = f"user_id_for_code_{code}"
-        user_id = cache.get(code_key)
+        auth_codes = caches['auth_codes']
+        user_id = auth_codes.get(code_key)
 
         if not user_id:
             return Response({"error": "The verification code has expired or is invalid."},
@@ -80,7 +83,7 @@ class VerifyEmailCodeView(GenericAPIView):
             return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
 
         cache_key = f"verification_code_{user.id}"
-        cached_code = cache.get(cache_key)
+        cached_code = auth_codes.get(cache_key)
 
         if not cached_code or cached_code != code:
             return Response({"error": "The verification code has expired or is invalid."},
@@ -90,8 +93,7 @@ class VerifyEmailCodeView(GenericAPIView):
         user.save()
         send_success_email(user.email)
 
-        cache.delete(cache_key)
-        cache.delete(code_key)
+        auth_codes.delete_many([cache_key, code_key])
 
         return Response({"message": "Verification successful! Your email has been verified."},
                         status=status.HTTP_200_OK)
@@ -153,7 +155,7 @@ class AddBalanceView(GenericAPIView):
             - Requires authentication.
 
         POST:
-            - Allows adding a specified amount to the account balance.
+            - Allows adding a specified amount to the account balance, recorded as a top-up in the ledger.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = AddBalanceSerializer
@@ -170,6 +172,23 @@ class AddBalanceView(GenericAPIView):
             }, status=status.HTTP_200_OK)
 
 
+class BalanceTransactionListView(ListAPIView):
+    """
+    A view to list the balance ledger of the authenticated user, newest first.
+
+    Permissions:
+        - Requires authentication.
+
+    GET:
+        - Returns the user's top-ups, purchases, refunds and bonuses.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = BalanceTransactionSerializer
+
+    def get_queryset(self):
+        return BalanceTransaction.objects.filter(account__user=self.request.user).order_by('-id')
+
+
 class PasswordResetRequestView(GenericAPIView):
     """
     A view for requesting a password reset email.